@@ -24,7 +24,6 @@ try:
     from cryptography.hazmat.primitives import hashes, serialization
     from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
     from cryptography.exceptions import InvalidSignature, InvalidTag
-    import binascii
     import struct
     import secrets
 except ImportError as e:
@@ -59,9 +58,9 @@ def run_phase1():
         steps.append({
             'step': 2,
             'title': 'Alice\'s public key ready',
-            'description': f'Alice\'s public key: {binascii.hexlify(alice_pub_bytes).decode()[:32]}...',
+            'description': f'Alice\'s public key: {alice_pub_bytes.hex()[:32]}...',
             'details': {
-                'public_key_hex': binascii.hexlify(alice_pub_bytes).decode(),
+                'public_key_hex': alice_pub_bytes.hex(),
                 'ready_to_send': True
             }
         })
@@ -82,9 +81,9 @@ def run_phase1():
         steps.append({
             'step': 4,
             'title': 'Bob\'s public key ready',
-            'description': f'Bob\'s public key: {binascii.hexlify(bob_pub_bytes).decode()[:32]}...',
+            'description': f'Bob\'s public key: {bob_pub_bytes.hex()[:32]}...',
             'details': {
-                'public_key_hex': binascii.hexlify(bob_pub_bytes).decode(),
+                'public_key_hex': bob_pub_bytes.hex(),
                 'ready_to_send': True
             }
         })
@@ -121,7 +120,7 @@ def run_phase1():
                 'kdf': 'HKDF-SHA256',
                 'output_length': '32 bytes (256 bits)',
                 'purpose': 'Suitable for ChaCha20-Poly1305 or AES-256',
-                'derived_key': binascii.hexlify(alice_key).decode()[:32] + '...'
+                'derived_key': alice_key.hex()[:32] + '...'
             }
         })
         
@@ -144,7 +143,7 @@ def run_phase1():
             'details': {
                 'kdf': 'HKDF-SHA256',
                 'output_length': '32 bytes (256 bits)',
-                'derived_key': binascii.hexlify(bob_key).decode()[:32] + '...'
+                'derived_key': bob_key.hex()[:32] + '...'
             }
         })
         
@@ -155,8 +154,8 @@ def run_phase1():
             'title': 'Key verification',
             'description': 'Verifying that both parties derived the same key (mathematical property of DH)',
             'details': {
-                'alice_key': binascii.hexlify(alice_key).decode(),
-                'bob_key': binascii.hexlify(bob_key).decode(),
+                'alice_key': alice_key.hex(),
+                'bob_key': bob_key.hex(),
                 'keys_match': keys_match,
                 'result': 'SUCCESS' if keys_match else 'FAILED'
             }
@@ -169,12 +168,12 @@ def run_phase1():
             'steps': steps,
             'data': {
                 'alice': {
-                    'public_key': binascii.hexlify(alice_pub_bytes).decode(),
-                    'shared_key': binascii.hexlify(alice_key).decode()
+                    'public_key': alice_pub_bytes.hex(),
+                    'shared_key': alice_key.hex()
                 },
                 'bob': {
-                    'public_key': binascii.hexlify(bob_pub_bytes).decode(),
-                    'shared_key': binascii.hexlify(bob_key).decode()
+                    'public_key': bob_pub_bytes.hex(),
+                    'shared_key': bob_key.hex()
                 },
                 'keys_match': keys_match
             },
@@ -182,8 +181,8 @@ def run_phase1():
                 'type': 'key_comparison',
                 'labels': ['Alice Shared Key', 'Bob Shared Key'],
                 'keys_match': keys_match,
-                'alice_key_hex': binascii.hexlify(alice_key).decode(),
-                'bob_key_hex': binascii.hexlify(bob_key).decode()
+                'alice_key_hex': alice_key.hex(),
+                'bob_key_hex': bob_key.hex()
             },
             'summary': 'Alice and Bob successfully derived the same shared key using Diffie-Hellman.' if keys_match else 'ERROR: Keys do not match!'
         })
@@ -218,7 +217,7 @@ def run_phase2():
             'details': {
                 'sender': 'Alice',
                 'intended_recipient': 'Bob',
-                'public_key': binascii.hexlify(alice_pub_bytes).decode()[:32] + '...'
+                'public_key': alice_pub_bytes.hex()[:32] + '...'
             }
         })
         
@@ -296,7 +295,7 @@ def run_phase2():
             'details': {
                 'sender': 'Bob',
                 'intended_recipient': 'Alice',
-                'public_key': binascii.hexlify(bob_pub_bytes).decode()[:32] + '...'
+                'public_key': bob_pub_bytes.hex()[:32] + '...'
             }
         })
         
@@ -346,7 +345,7 @@ def run_phase2():
             'description': 'Alice uses her private key and the "Bob" key she received (actually Mallory\'s fake key)',
             'details': {
                 'operation': 'DH(alice_private, fake_bob_public)',
-                'result': f'Key: {binascii.hexlify(alice_shared).decode()[:32]}...',
+                'result': f'Key: {alice_shared.hex()[:32]}...',
                 'alice_thinks': 'Alice believes she shares this key with Bob',
                 'reality': 'Alice actually shares this key with Mallory'
             }
@@ -359,7 +358,7 @@ def run_phase2():
             'description': 'Bob uses his private key and the "Alice" key he received (actually Mallory\'s fake key)',
             'details': {
                 'operation': 'DH(bob_private, fake_alice_public)',
-                'result': f'Key: {binascii.hexlify(bob_shared).decode()[:32]}...',
+                'result': f'Key: {bob_shared.hex()[:32]}...',
                 'bob_thinks': 'Bob believes he shares this key with Alice',
                 'reality': 'Bob actually shares this key with Mallory'
             }
@@ -374,10 +373,10 @@ def run_phase2():
             'title': '🔴 ATTACK ANALYSIS',
             'description': 'Comparing all derived keys to verify the attack',
             'details': {
-                'alice_key': binascii.hexlify(alice_shared).decode()[:32] + '...',
-                'bob_key': binascii.hexlify(bob_shared).decode()[:32] + '...',
-                'mallory_alice_key': binascii.hexlify(mallory_key_with_alice).decode()[:32] + '...',
-                'mallory_bob_key': binascii.hexlify(mallory_key_with_bob).decode()[:32] + '...',
+                'alice_key': alice_shared.hex()[:32] + '...',
+                'bob_key': bob_shared.hex()[:32] + '...',
+                'mallory_alice_key': mallory_key_with_alice.hex()[:32] + '...',
+                'mallory_bob_key': mallory_key_with_bob.hex()[:32] + '...',
                 'alice_bob_match': alice_shared == bob_shared,
                 'alice_mallory_match': alice_shared == mallory_key_with_alice,
                 'bob_mallory_match': bob_shared == mallory_key_with_bob,
@@ -393,18 +392,18 @@ def run_phase2():
             'steps': steps,
             'data': {
                 'alice': {
-                    'public_key': binascii.hexlify(alice_pub_bytes).decode(),
-                    'shared_key': binascii.hexlify(alice_shared).decode()
+                    'public_key': alice_pub_bytes.hex(),
+                    'shared_key': alice_shared.hex()
                 },
                 'bob': {
-                    'public_key': binascii.hexlify(bob_pub_bytes).decode(),
-                    'shared_key': binascii.hexlify(bob_shared).decode()
+                    'public_key': bob_pub_bytes.hex(),
+                    'shared_key': bob_shared.hex()
                 },
                 'mallory': {
-                    'key_with_alice': binascii.hexlify(mallory_key_with_alice).decode(),
-                    'key_with_bob': binascii.hexlify(mallory_key_with_bob).decode(),
-                    'fake_alice_key': binascii.hexlify(mallory_alice_pub_bytes).decode(),
-                    'fake_bob_key': binascii.hexlify(mallory_bob_pub_bytes).decode()
+                    'key_with_alice': mallory_key_with_alice.hex(),
+                    'key_with_bob': mallory_key_with_bob.hex(),
+                    'fake_alice_key': mallory_alice_pub_bytes.hex(),
+                    'fake_bob_key': mallory_bob_pub_bytes.hex()
                 },
                 'attack_success': attack_success,
                 'alice_bob_keys_differ': alice_shared != bob_shared
@@ -412,10 +411,10 @@ def run_phase2():
             'visualization': {
                 'type': 'mitm_comparison',
                 'keys': {
-                    'alice': binascii.hexlify(alice_shared).decode()[:16] + '...',
-                    'bob': binascii.hexlify(bob_shared).decode()[:16] + '...',
-                    'mallory_alice': binascii.hexlify(mallory_key_with_alice).decode()[:16] + '...',
-                    'mallory_bob': binascii.hexlify(mallory_key_with_bob).decode()[:16] + '...'
+                    'alice': alice_shared.hex()[:16] + '...',
+                    'bob': bob_shared.hex()[:16] + '...',
+                    'mallory_alice': mallory_key_with_alice.hex()[:16] + '...',
+                    'mallory_bob': mallory_key_with_bob.hex()[:16] + '...'
                 },
                 'attack_success': attack_success
             },
@@ -518,7 +517,7 @@ def run_phase3():
                 'details': {
                     'verification_result': 'VALID',
                     'action': 'Key exchange proceeds',
-                    'shared_key': binascii.hexlify(bob_key).decode()[:32] + '...'
+                    'shared_key': bob_key.hex()[:32] + '...'
                 }
             })
         except InvalidSignature:
@@ -576,7 +575,7 @@ def run_phase3():
                 'details': {
                     'verification_result': 'VALID',
                     'action': 'Key exchange proceeds',
-                    'shared_key': binascii.hexlify(alice_key).decode()[:32] + '...'
+                    'shared_key': alice_key.hex()[:32] + '...'
                 }
             })
         except InvalidSignature:
@@ -655,15 +654,15 @@ def run_phase3():
             'steps': steps,
             'data': {
                 'alice': {
-                    'dh_public_key': binascii.hexlify(alice_dh_pub_bytes).decode(),
-                    'signing_public_key': binascii.hexlify(alice_signing_pub_bytes).decode(),
-                    'shared_key': binascii.hexlify(alice_key).decode() if alice_key else None,
+                    'dh_public_key': alice_dh_pub_bytes.hex(),
+                    'signing_public_key': alice_signing_pub_bytes.hex(),
+                    'shared_key': alice_key.hex() if alice_key else None,
                     'signature_valid': bob_signature_valid
                 },
                 'bob': {
-                    'dh_public_key': binascii.hexlify(bob_dh_pub_bytes).decode(),
-                    'signing_public_key': binascii.hexlify(bob_signing_pub_bytes).decode(),
-                    'shared_key': binascii.hexlify(bob_key).decode() if bob_key else None,
+                    'dh_public_key': bob_dh_pub_bytes.hex(),
+                    'signing_public_key': bob_signing_pub_bytes.hex(),
+                    'shared_key': bob_key.hex() if bob_key else None,
                     'signature_valid': alice_signature_valid
                 },
                 'authenticated': authenticated,
@@ -718,7 +717,7 @@ def run_phase4():
             'details': {
                 'key_size': '32 bytes (256 bits)',
                 'key_type': 'Suitable for ChaCha20-Poly1305 or AES-256-GCM',
-                'key_preview': binascii.hexlify(shared_key).decode()[:32] + '...'
+                'key_preview': shared_key.hex()[:32] + '...'
             }
         })
         
@@ -784,7 +783,7 @@ def run_phase4():
                 'plaintext_length': f'{len(test_message)} bytes',
                 'ciphertext_length': f'{len(ciphertext)} bytes',
                 'overhead': f'{len(ciphertext) - len(test_message)} bytes (authentication tag)',
-                'nonce_hex': binascii.hexlify(nonce).decode()
+                'nonce_hex': nonce.hex()
             }
         })
         
@@ -955,13 +954,13 @@ def run_phase5():
                 },
                 'alice': {
                     'address': blockchain_registry['alice_address'],
-                    'public_key': binascii.hexlify(alice_signing_pub_bytes).decode(),
+                    'public_key': alice_signing_pub_bytes.hex(),
                     'registered': alice_registered,
                     'verified': alice_key_verified
                 },
                 'bob': {
                     'address': blockchain_registry['bob_address'],
-                    'public_key': binascii.hexlify(bob_signing_pub_bytes).decode(),
+                    'public_key': bob_signing_pub_bytes.hex(),
                     'registered': bob_registered,
                     'verified': bob_key_verified
                 }
@@ -1183,17 +1182,17 @@ def run_phase6():
                 },
                 'alice': {
                     'address': blockchain_registry['alice_address'],
-                    'public_key': binascii.hexlify(alice_signing_pub_bytes).decode(),
+                    'public_key': alice_signing_pub_bytes.hex(),
                     'registered': True
                 },
                 'bob': {
                     'address': blockchain_registry['bob_address'],
-                    'public_key': binascii.hexlify(bob_signing_pub_bytes).decode(),
+                    'public_key': bob_signing_pub_bytes.hex(),
                     'registered': True
                 },
                 'mallory': {
                     'address': blockchain_registry['mallory_address'],
-                    'public_key': binascii.hexlify(mallory_signing_pub_bytes).decode(),
+                    'public_key': mallory_signing_pub_bytes.hex(),
                     'registered': True
                 },
                 'attacks': {
@@ -0,0 +1,24 @@
+# HKDF-SHA256 (RFC 5869) for the phases' DH key derivation.
+#
+# Every phase derives a 32-byte key from an X25519 shared secret with no salt,
+# so HKDF is inlined here: extract from precomputed pad states, then a single
+# expand block.
+
+import hashlib
+import hmac
+
+_HKDF_ZERO_SALT = b"\x00" * 32  # HKDF with no salt = HashLen zero bytes (RFC 5869)
+
+# The extract step is HMAC keyed with that fixed salt, so the inner/outer pad
+# blocks can be hashed once here and copied per derivation.
+_HKDF_EXTRACT_INNER = hashlib.sha256(bytes(b ^ 0x36 for b in _HKDF_ZERO_SALT.ljust(64, b"\x00")))
+_HKDF_EXTRACT_OUTER = hashlib.sha256(bytes(b ^ 0x5C for b in _HKDF_ZERO_SALT.ljust(64, b"\x00")))
+
+def hkdf_sha256(shared_secret: bytes, info: bytes) -> bytes:
+    # 32-byte key from a DH shared secret (unsalted extract, one expand block).
+    inner = _HKDF_EXTRACT_INNER.copy()
+    inner.update(shared_secret)
+    outer = _HKDF_EXTRACT_OUTER.copy()
+    outer.update(inner.digest())
+    prk = outer.digest()
+    return hmac.digest(prk, info + b"\x01", "sha256")
@@ -2,36 +2,38 @@
 #
 # Mallory swaps public keys so Alice and Bob each end up sharing a key with Mallory.
 
-from cryptography.hazmat.primitives.asymmetric import x25519
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives import serialization
-import binascii
+import nacl.bindings
+import nacl.exceptions
+import logging
+import sys
+from collections import OrderedDict
+
+from phases.hkdf import hkdf_sha256
+
+# Per-operation trace (keys, intercepts). Silent unless DEBUG is enabled; the
+# demo below turns it on so the walkthrough shows every step.
+log = logging.getLogger(__name__)
+
+MALLORY_KEY_CACHE_SIZE = 4096  # derived keys Mallory keeps (LRU)
 
 def generate_x25519_keypair():
-    # Generate an X25519 keypair.
-    private = x25519.X25519PrivateKey.generate()
-    public = private.public_key()
+    # Generate an X25519 keypair as raw 32-byte (private, public) values (libsodium).
+    public, private = nacl.bindings.crypto_box_keypair()
     return private, public
 
 def public_bytes(public_key):
-    return public_key.public_bytes(
-        encoding=serialization.Encoding.Raw,
-        format=serialization.PublicFormat.Raw
-    )
+    # Keys are already raw 32-byte values.
+    return bytes(public_key)
 
-def derive_shared_key(our_private: x25519.X25519PrivateKey, their_public_bytes: bytes, info: bytes = b"secure_channel_v1"):
+def derive_shared_key(our_private: bytes, their_public_bytes: bytes, info: bytes = b"secure_channel_v1"):
     # DH exchange + HKDF to produce a 32-byte symmetric key.
-    their_public = x25519.X25519PublicKey.from_public_bytes(their_public_bytes)
-    shared_secret = our_private.exchange(their_public)
-    hkdf = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=info,
-    )
-    key = hkdf.derive(shared_secret)
-    return key
+    # One libsodium scalarmult, then the shared inlined HKDF-SHA256.
+    try:
+        shared_secret = nacl.bindings.crypto_scalarmult(our_private, their_public_bytes)
+    except nacl.exceptions.RuntimeError:
+        # libsodium rejects low-order peer points (all-zero shared secret)
+        raise ValueError("Invalid X25519 public key")
+    return hkdf_sha256(shared_secret, info)
 
 
 class Participant:
@@ -40,20 +42,21 @@ class Participant:
     def __init__(self, name):
         self.name = name
         self.private_key = None
-        self.public_key = None
         self.public_key_bytes = None
         self.shared_key = None
     
     def generate_keypair(self):
-        self.private_key, self.public_key = generate_x25519_keypair()
-        self.public_key_bytes = public_bytes(self.public_key)
-        print(f"{self.name}: Generated keypair")
-        print(f"{self.name}: Public key (hex): {binascii.hexlify(self.public_key_bytes).decode()}")
+        # Raw 32-byte keys only; there is no key object to keep around.
+        self.private_key, self.public_key_bytes = generate_x25519_keypair()
+        log.debug("%s: Generated keypair", self.name)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s: Public key (hex): %s", self.name, self.public_key_bytes.hex())
     
     def derive_key(self, peer_public_bytes):
         # Derive the shared key from a peer's (unauthenticated) public key.
         self.shared_key = derive_shared_key(self.private_key, peer_public_bytes)
-        print(f"{self.name}: Derived shared key (hex): {binascii.hexlify(self.shared_key).decode()}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s: Derived shared key (hex): %s", self.name, self.shared_key.hex())
 
 
 class Mallory:
@@ -61,44 +64,58 @@ class Mallory:
     
     def __init__(self):
         self.name = "Mallory"
-        self.alice_priv, self.alice_pub = generate_x25519_keypair()
-        self.bob_priv, self.bob_pub = generate_x25519_keypair()
-        self.alice_pub_bytes = public_bytes(self.alice_pub)  # sent to Bob
-        self.bob_pub_bytes = public_bytes(self.bob_pub)      # sent to Alice
+        self.alice_priv, self.alice_pub_bytes = generate_x25519_keypair()  # alice_pub_bytes sent to Bob
+        self.bob_priv, self.bob_pub_bytes = generate_x25519_keypair()      # bob_pub_bytes sent to Alice
 
         self.key_with_alice = None
         self.key_with_bob = None
+
+        # (sender role, victim public) -> derived key. Each role always uses the
+        # same one of our privates, so replayed victims don't need another DH +
+        # HKDF - and no private key ends up as a cache key.
+        self._key_cache = OrderedDict()
+
+        # Sender name -> (private to use, fake public to forward, key attribute,
+        # who we pretend to be). One lookup instead of an if/elif on the name.
+        self._roles = {
+            "Alice": (self.bob_priv, self.bob_pub_bytes, "key_with_alice", "Bob"),
+            "Bob": (self.alice_priv, self.alice_pub_bytes, "key_with_bob", "Alice"),
+        }
         
-        print(f"{self.name}: Generated keypairs for attack")
-        print(f"{self.name}: Public key for impersonating Alice (hex): {binascii.hexlify(self.alice_pub_bytes).decode()}")
-        print(f"{self.name}: Public key for impersonating Bob (hex): {binascii.hexlify(self.bob_pub_bytes).decode()}")
+        log.debug("%s: Generated keypairs for attack", self.name)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s: Public key for impersonating Alice (hex): %s", self.name, self.alice_pub_bytes.hex())
+            log.debug("%s: Public key for impersonating Bob (hex): %s", self.name, self.bob_pub_bytes.hex())
     
     def intercept_and_replace(self, message_from, message_to):
         # Intercept a public key and forward Mallory's instead.
-        real_pub_bytes = message_from.public_key_bytes
-        
-        # Handle the case where Alice is sending her key to Bob
-        if message_from.name == "Alice":
-            self.key_with_alice = derive_shared_key(
-                self.bob_priv,
-                real_pub_bytes
-            )
-            print(f"{self.name}: [INTERCEPTED] Alice's public key")
-            print(f"{self.name}: Derived key with Alice (hex): {binascii.hexlify(self.key_with_alice).decode()}")
-            print(f"{self.name}: [FORWARDING] Fake Bob's public key to Alice")
-            return self.bob_pub_bytes
-        
-        # Handle the case where Bob is sending his key to Alice
-        elif message_from.name == "Bob":
-            self.key_with_bob = derive_shared_key(
-                self.alice_priv,
-                real_pub_bytes
-            )
-            print(f"{self.name}: [INTERCEPTED] Bob's public key")
-            print(f"{self.name}: Derived key with Bob (hex): {binascii.hexlify(self.key_with_bob).decode()}")
-            print(f"{self.name}: [FORWARDING] Fake Alice's public key to Bob")
-            return self.alice_pub_bytes
+        role = self._roles.get(message_from.name)
+        if role is None:
+            return None
+        our_priv, fake_pub_bytes, key_attr, impersonated = role
+
+        key = self._derive_key_cached(message_from.name, our_priv, message_from.public_key_bytes)
+        setattr(self, key_attr, key)
+        if log.isEnabledFor(logging.DEBUG):
+            sender = message_from.name
+            log.debug("%s: [INTERCEPTED] %s's public key", self.name, sender)
+            log.debug("%s: Derived key with %s (hex): %s", self.name, sender, key.hex())
+            log.debug("%s: [FORWARDING] Fake %s's public key to %s", self.name, impersonated, sender)
+        return fake_pub_bytes
     
+    def _derive_key_cached(self, role, our_private, victim_pub_bytes):
+        # derive_shared_key, memoized per (sender role, victim public) pair.
+        cache_key = (role, bytes(victim_pub_bytes))
+        key = self._key_cache.get(cache_key)
+        if key is not None:
+            self._key_cache.move_to_end(cache_key)
+            return key
+        key = derive_shared_key(our_private, victim_pub_bytes)
+        self._key_cache[cache_key] = key
+        if len(self._key_cache) > MALLORY_KEY_CACHE_SIZE:
+            self._key_cache.popitem(last=False)
+        return key
+
     def can_decrypt(self, encrypted_message, sender):
         if sender == "Alice":
             return self.key_with_alice is not None
@@ -152,10 +169,10 @@ def demonstrate_mitm_attack():
     print("ATTACK RESULTS")
     print("=" * 70)
     
-    print(f"\nAlice's shared key (hex): {binascii.hexlify(alice.shared_key).decode()}")
-    print(f"Bob's shared key   (hex): {binascii.hexlify(bob.shared_key).decode()}")
-    print(f"Mallory's key with Alice (hex): {binascii.hexlify(mallory.key_with_alice).decode()}")
-    print(f"Mallory's key with Bob   (hex): {binascii.hexlify(mallory.key_with_bob).decode()}")
+    print(f"\nAlice's shared key (hex): {alice.shared_key.hex()}")
+    print(f"Bob's shared key   (hex): {bob.shared_key.hex()}")
+    print(f"Mallory's key with Alice (hex): {mallory.key_with_alice.hex()}")
+    print(f"Mallory's key with Bob   (hex): {mallory.key_with_bob.hex()}")
     
     # Verify the attack succeeded
     print("\n" + "-" * 70)
@@ -190,5 +207,8 @@ public keys. This will be demonstrated in Phase 3.
 
 
 if __name__ == "__main__":
+    # Show this module's trace only (not DEBUG from imported libraries/phases).
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    log.setLevel(logging.DEBUG)
     demonstrate_mitm_attack()
 
@@ -3,11 +3,23 @@
 # We sign DH public keys so a MITM can't swap them unnoticed.
 
 from cryptography.hazmat.primitives.asymmetric import x25519, ed25519
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives import serialization
 from cryptography.exceptions import InvalidSignature
-import binascii
+import functools
+import hmac
+import logging
+import os
+import sys
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from phases.hkdf import hkdf_sha256
+
+# Per-operation trace (keys, signatures, verify results). Silent unless DEBUG
+# is enabled; the demo below turns it on.
+log = logging.getLogger(__name__)
+
+PEER_KEY_CACHE_SIZE = 256  # derived keys a participant keeps per DH keypair (LRU)
 
 def generate_x25519_keypair():
     # Generate an X25519 keypair.
@@ -15,80 +27,181 @@ def generate_x25519_keypair():
     public = private.public_key()
     return private, public
 
+# Raw 32-byte public key serialization, looked up once.
+_RAW_ENCODING = serialization.Encoding.Raw
+_RAW_PUBLIC_FORMAT = serialization.PublicFormat.Raw
+
 def public_bytes(public_key):
     # Serialize an X25519 public key to raw bytes (32 bytes).
     return public_key.public_bytes(
-        encoding=serialization.Encoding.Raw,
-        format=serialization.PublicFormat.Raw
+        encoding=_RAW_ENCODING,
+        format=_RAW_PUBLIC_FORMAT
     )
 
+def load_signing_public_key(pub_bytes) -> ed25519.Ed25519PublicKey:
+    # Parse a raw Ed25519 public key from any bytes-like buffer. The memo
+    # below is keyed by value, so unhashable buffers (bytearray, memoryview)
+    # are copied to bytes first.
+    return _load_signing_public_key(bytes(pub_bytes))
+
+@functools.lru_cache(maxsize=256)
+def _load_signing_public_key(pub_bytes: bytes) -> ed25519.Ed25519PublicKey:
+    # Memoized: loading decompresses the curve point, and the same peer key
+    # tends to be checked again and again.
+    # Raises ValueError for a malformed key (not cached).
+    return ed25519.Ed25519PublicKey.from_public_bytes(pub_bytes)
+
 def derive_shared_key(our_private: x25519.X25519PrivateKey, their_public_bytes: bytes, info: bytes = b"secure_channel_v1"):
     # Derive shared key from DH exchange.
     their_public = x25519.X25519PublicKey.from_public_bytes(their_public_bytes)
     shared_secret = our_private.exchange(their_public)
-    hkdf = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=info,
-    )
-    key = hkdf.derive(shared_secret)
-    return key
+    return hkdf_sha256(shared_secret, info)
+
+def derive_shared_keys_batch(our_privates, their_public_bytes_list, info: bytes = b"secure_channel_v1"):
+    # Derive one shared key per (private, peer public) pair, e.g. for a burst of handshakes.
+    if len(our_privates) != len(their_public_bytes_list):
+        raise ValueError("Need one peer public key per private key")
+    return [
+        derive_shared_key(our_private, their_public_bytes, info)
+        for our_private, their_public_bytes in zip(our_privates, their_public_bytes_list)
+    ]
 
 
 class AuthenticatedParticipant:
     # Participant that signs its DH public key (Ed25519).
+    # Fixed slots + typed attributes: cheaper attribute access, and the class
+    # can be compiled as-is with mypyc if the glue ever shows up in profiles.
+
+    __slots__ = (
+        "name",
+        "dh_private", "dh_public_bytes",
+        "signing_private", "signing_public_bytes",
+        "shared_key", "_key_cache",
+    )
     
-    def __init__(self, name):
-        self.name = name
+    def __init__(self, name: str):
+        self.name: str = name
 
-        # DH keys (X25519) and identity/signing keys (Ed25519)
-        self.dh_private = None
-        self.dh_public = None
-        self.dh_public_bytes = None
-        self.signing_private = None
-        self.signing_public = None
-        self.signing_public_bytes = None
+        # DH keys (X25519) and identity/signing keys (Ed25519). Public halves
+        # are kept only as their raw 32 bytes - that's all we ever send.
+        self.dh_private: Optional[x25519.X25519PrivateKey] = None
+        self.dh_public_bytes: Optional[bytes] = None
+        self.signing_private: Optional[ed25519.Ed25519PrivateKey] = None
+        self.signing_public_bytes: Optional[bytes] = None
 
-        self.shared_key = None
+        self.shared_key: Optional[bytes] = None
+        # (peer DH public bytes) -> derived key, valid for our current DH keypair.
+        # Lets a reconnect with the same peer skip X25519 + HKDF.
+        self._key_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
     
     def generate_keypairs(self):
-        # Generate fresh DH keys and a signing keypair (demo version).
-        self.dh_private, self.dh_public = generate_x25519_keypair()
-        self.dh_public_bytes = public_bytes(self.dh_public)
-
-        self.signing_private = ed25519.Ed25519PrivateKey.generate()
-        self.signing_public = self.signing_private.public_key()
-        self.signing_public_bytes = self.signing_public.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
+        # Generate fresh (ephemeral) DH keys. The Ed25519 signing keypair is our
+        # long-term identity - it's what peers (and the Phase 5 registry) know us
+        # by - so it's only created on the first call and kept after that.
+        # One OS RNG read covers every 32-byte private key we need.
+        new_identity = self.signing_private is None
+        seeds = os.urandom(64 if new_identity else 32)
+        self.dh_private = x25519.X25519PrivateKey.from_private_bytes(seeds[:32])
+        self.dh_public_bytes = public_bytes(self.dh_private.public_key())
+        self._key_cache.clear()
+
+        if new_identity:
+            self.signing_private = ed25519.Ed25519PrivateKey.from_private_bytes(seeds[32:])
+            self.signing_public_bytes = self.signing_private.public_key().public_bytes(
+                encoding=_RAW_ENCODING,
+                format=_RAW_PUBLIC_FORMAT
+            )
         
-        print(f"{self.name}: Generated DH keypair and Ed25519 signing keypair")
-        print(f"{self.name}: DH public key (hex): {binascii.hexlify(self.dh_public_bytes).decode()}")
-        print(f"{self.name}: Ed25519 public key (hex): {binascii.hexlify(self.signing_public_bytes).decode()}")
+        if log.isEnabledFor(logging.DEBUG):
+            if new_identity:
+                log.debug("%s: Generated DH keypair and Ed25519 signing keypair", self.name)
+            else:
+                log.debug("%s: Generated DH keypair (keeping Ed25519 signing keypair)", self.name)
+            log.debug("%s: DH public key (hex): %s", self.name, self.dh_public_bytes.hex())
+            log.debug("%s: Ed25519 public key (hex): %s", self.name, self.signing_public_bytes.hex())
     
-    def sign_dh_public_key(self):
+    def sign_dh_public_key(self) -> bytes:
         # Sign our DH public key.
         signature = self.signing_private.sign(self.dh_public_bytes)
-        print(f"{self.name}: Signed DH public key")
-        print(f"{self.name}: Signature (hex): {binascii.hexlify(signature).decode()}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s: Signed DH public key", self.name)
+            log.debug("%s: Signature (hex): %s", self.name, signature.hex())
         return signature
     
-    def verify_and_derive_key(self, peer_dh_pub_bytes, peer_signing_pub_bytes, signature):
+    def verify_and_derive_key(self, peer_dh_pub_bytes: bytes, peer_signing_pub_bytes: bytes, signature: bytes) -> Tuple[bool, Optional[bytes]]:
         # Verify signature on peer DH public key, then derive shared key.
         try:
-            peer_signing_pub = ed25519.Ed25519PublicKey.from_public_bytes(peer_signing_pub_bytes)
+            peer_signing_pub = load_signing_public_key(peer_signing_pub_bytes)
             peer_signing_pub.verify(signature, peer_dh_pub_bytes)
-            print(f"{self.name}: [SUCCESS] Signature verification SUCCESS")
-
-            self.shared_key = derive_shared_key(self.dh_private, peer_dh_pub_bytes)
-            print(f"{self.name}: Derived shared key (hex): {binascii.hexlify(self.shared_key).decode()}")
-            return True, self.shared_key
+            log.debug("%s: [SUCCESS] Signature verification SUCCESS", self.name)
+            return True, self.derive_key_for_verified_peer(peer_dh_pub_bytes)
         
         except InvalidSignature:
-            print(f"{self.name}: [FAILED] Signature verification FAILED - rejecting key exchange")
+            log.debug("%s: [FAILED] Signature verification FAILED - rejecting key exchange", self.name)
             return False, None
+        except ValueError:
+            # Malformed signing key, or a DH public key that yields no usable
+            # shared secret (wrong length, low order).
+            log.debug("%s: [FAILED] Invalid peer key - rejecting key exchange", self.name)
+            return False, None
+
+    def derive_key_for_verified_peer(self, peer_dh_pub_bytes: bytes) -> bytes:
+        # Derive (and keep as shared_key) the key for a peer whose signature the
+        # caller has already checked, e.g. off-thread alongside another check.
+        # Raises ValueError for a DH public key with no usable shared secret.
+        self.shared_key = self._derive_key_cached(peer_dh_pub_bytes)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s: Derived shared key (hex): %s", self.name, self.shared_key.hex())
+        return self.shared_key
+
+    def verify_and_derive_keys_batch(self, peers) -> List[Tuple[bool, Optional[bytes]]]:
+        # Verify several peers' (dh_pub, signing_pub, signature) triples and derive
+        # a shared key for each one that checks out. Returns one (valid, key) per
+        # peer, in order; a bad entry only fails its own slot. Signatures are all
+        # checked before any DH work. Verification is per signature: neither
+        # cryptography nor PyNaCl exposes Ed25519 batch verification.
+        valid = []
+        for peer_dh_pub_bytes, peer_signing_pub_bytes, signature in peers:
+            try:
+                load_signing_public_key(peer_signing_pub_bytes).verify(signature, peer_dh_pub_bytes)
+                valid.append(True)
+            except (InvalidSignature, ValueError):
+                valid.append(False)
+
+        results = []
+        for ok, peer in zip(valid, peers):
+            if not ok:
+                results.append((False, None))
+                continue
+            try:
+                results.append((True, self._derive_key_cached(peer[0])))
+            except ValueError:
+                # Validly signed, but not a usable DH key (wrong length, low order).
+                results.append((False, None))
+        log.debug("%s: Verified %d/%d peer signatures", self.name, sum(valid), len(valid))
+        return results
+
+    def clear_keys(self):
+        # Drop all key material: the shared key, the per-peer key cache and both
+        # private keys. generate_keypairs() starts afresh (new identity) after.
+        self.shared_key = None
+        self._key_cache.clear()
+        self.dh_private = None
+        self.signing_private = None
+
+    def _derive_key_cached(self, peer_dh_pub_bytes: bytes) -> bytes:
+        # derive_shared_key with our DH private, memoized per peer DH public key.
+        # Keyed by value, so bytearray/memoryview keys are copied to bytes first.
+        peer = bytes(peer_dh_pub_bytes)
+        key = self._key_cache.get(peer)
+        if key is not None:
+            self._key_cache.move_to_end(peer)
+            return key
+        key = derive_shared_key(self.dh_private, peer)
+        self._key_cache[peer] = key
+        if len(self._key_cache) > PEER_KEY_CACHE_SIZE:
+            self._key_cache.popitem(last=False)
+        return key
 
 
 class AuthenticatedMallory:
@@ -97,21 +210,20 @@ class AuthenticatedMallory:
     def __init__(self):
         self.name = "Mallory"
         # Mallory generates her own keypairs
-        self.dh_priv, self.dh_pub = generate_x25519_keypair()
-        self.dh_pub_bytes = public_bytes(self.dh_pub)
+        self.dh_priv, dh_pub = generate_x25519_keypair()
+        self.dh_pub_bytes = public_bytes(dh_pub)
         self.signing_priv = ed25519.Ed25519PrivateKey.generate()
-        self.signing_pub = self.signing_priv.public_key()
-        self.signing_pub_bytes = self.signing_pub.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
+        self.signing_pub_bytes = self.signing_priv.public_key().public_bytes(
+            encoding=_RAW_ENCODING,
+            format=_RAW_PUBLIC_FORMAT
         )
-        print(f"{self.name}: Generated own keypairs (cannot forge Alice's or Bob's signatures)")
+        log.debug("%s: Generated own keypairs (cannot forge Alice's or Bob's signatures)", self.name)
     
     def intercept_and_replace(self, message_from):
         # Return Mallory's own signed DH key (won't verify as Alice/Bob).
         signature = self.signing_priv.sign(self.dh_pub_bytes)
-        print(f"{self.name}: [ATTEMPTING] Intercepting {message_from.name}'s message")
-        print(f"{self.name}: [CREATING] Fake signed message with own keys (signature won't match!)")
+        log.debug("%s: [ATTEMPTING] Intercepting %s's message", self.name, message_from.name)
+        log.debug("%s: [CREATING] Fake signed message with own keys (signature won't match!)", self.name)
         return self.dh_pub_bytes, self.signing_pub_bytes, signature
 
 
@@ -177,9 +289,10 @@ def demonstrate_authenticated_exchange():
     print("AUTHENTICATED KEY EXCHANGE RESULTS")
     print("=" * 70)
     
-    if alice.shared_key == bob.shared_key:
+    # Constant-time compare (no early exit on the first differing byte)
+    if hmac.compare_digest(alice.shared_key, bob.shared_key):
         print("[SUCCESS] Alice and Bob derived the same shared key")
-        print(f"   Shared key (hex): {binascii.hexlify(alice.shared_key).decode()}")
+        print(f"   Shared key (hex): {alice.shared_key.hex()}")
     else:
         print("[ERROR] Keys differ!")
     
@@ -224,5 +337,8 @@ This will be demonstrated in Phase 4.
 
 
 if __name__ == "__main__":
+    # Show this module's trace only (not DEBUG from imported libraries/phases).
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    log.setLevel(logging.DEBUG)
     demonstrate_authenticated_exchange()
 
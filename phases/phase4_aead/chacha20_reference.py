@@ -0,0 +1,107 @@
+# ChaCha20 stream cipher (RFC 8439) written out by hand, for teaching.
+#
+# secure_channel.py uses the real implementation from `cryptography`. This file
+# shows what happens inside it: a 4x4 grid of 32-bit words mixed by 20 rounds of
+# add/rotate/xor ("ARX") quarter rounds. If numba is installed the core is
+# JIT-compiled, with blocks computed in parallel (fast enough to actually use);
+# otherwise it runs as plain Python.
+#
+# No Poly1305 here - this is the cipher half of ChaCha20-Poly1305 only.
+
+import struct
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+MASK32 = 0xFFFFFFFF
+CONSTANTS = (0x61707865, 0x3320646E, 0x79622D32, 0x6B206574)  # "expand 32-byte k"
+
+
+def _rotl32(v, n):
+    # Rotate a 32-bit word left by n bits.
+    return ((v << n) | (v >> (32 - n))) & MASK32
+
+
+def _quarter_round(x, a, b, c, d):
+    # The ChaCha quarter round on words a, b, c, d of the state.
+    x[a] = (x[a] + x[b]) & MASK32
+    x[d] = _rotl32(x[d] ^ x[a], 16)
+    x[c] = (x[c] + x[d]) & MASK32
+    x[b] = _rotl32(x[b] ^ x[c], 12)
+    x[a] = (x[a] + x[b]) & MASK32
+    x[d] = _rotl32(x[d] ^ x[a], 8)
+    x[c] = (x[c] + x[d]) & MASK32
+    x[b] = _rotl32(x[b] ^ x[c], 7)
+
+
+def _block(state, counter, out):
+    # One 64-byte keystream block for block counter `counter`: 20 rounds on a
+    # copy of the state, then add the input back.
+    x = state.copy()
+    x[12] = counter
+    for _ in range(10):
+        # Column rounds
+        _quarter_round(x, 0, 4, 8, 12)
+        _quarter_round(x, 1, 5, 9, 13)
+        _quarter_round(x, 2, 6, 10, 14)
+        _quarter_round(x, 3, 7, 11, 15)
+        # Diagonal rounds
+        _quarter_round(x, 0, 5, 10, 15)
+        _quarter_round(x, 1, 6, 11, 12)
+        _quarter_round(x, 2, 7, 8, 13)
+        _quarter_round(x, 3, 4, 9, 14)
+    for i in range(16):
+        out[i] = (x[i] + state[i]) & MASK32
+    out[12] = (x[12] + counter) & MASK32
+
+
+def _keystream(state, n_blocks):
+    # Keystream words for n_blocks consecutive block counters. Blocks are
+    # independent (each only differs in word 12), so under numba they are
+    # spread across cores with prange.
+    out = np.empty(n_blocks * 16, dtype=np.int64)
+    for i in prange(n_blocks):
+        _block(state, (state[12] + i) & MASK32, out[i * 16:(i + 1) * 16])
+    return out
+
+
+if njit is not None:
+    _rotl32 = njit(cache=True)(_rotl32)
+    _quarter_round = njit(cache=True)(_quarter_round)
+    _block = njit(cache=True)(_block)
+    _keystream = njit(cache=True, parallel=True)(_keystream)
+
+
+def chacha20_encrypt(key: bytes, nonce: bytes, data: bytes, counter: int = 1) -> bytes:
+    # XOR data with the ChaCha20 keystream (encrypt and decrypt are the same).
+    # counter=1 matches how ChaCha20-Poly1305 uses the cipher (block 0 is the MAC key).
+    if len(key) != 32:
+        raise ValueError("ChaCha20 key must be 32 bytes")
+    if len(nonce) != 12:
+        raise ValueError("ChaCha20 nonce must be 12 bytes")
+
+    state = np.empty(16, dtype=np.int64)
+    state[0:4] = CONSTANTS
+    state[4:12] = struct.unpack('<8I', key)
+    state[12] = counter & MASK32
+    state[13:16] = struct.unpack('<3I', nonce)
+
+    n_blocks = (len(data) + 63) // 64
+    keystream = _keystream(state, n_blocks).astype('<u4').tobytes()[:len(data)]
+    return (np.frombuffer(data, dtype=np.uint8) ^ np.frombuffer(keystream, dtype=np.uint8)).tobytes()
+
+
+if __name__ == "__main__":
+    # Check against the `cryptography` implementation.
+    import os
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+
+    key, nonce, message = os.urandom(32), os.urandom(12), os.urandom(1000)
+    ours = chacha20_encrypt(key, nonce, message)
+    theirs = Cipher(algorithms.ChaCha20(key, (1).to_bytes(4, 'little') + nonce), mode=None).encryptor().update(message)
+    print("numba JIT:", "on" if njit is not None else "off (pure Python)")
+    print("[SUCCESS] Matches cryptography's ChaCha20" if ours == theirs else "[ERROR] Keystream mismatch!")
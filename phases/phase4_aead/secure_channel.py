@@ -2,87 +2,80 @@
 #
 # Authenticated DH sets the key; ChaCha20-Poly1305 encrypts + authenticates messages.
 
-from cryptography.hazmat.primitives.asymmetric import x25519, ed25519
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
-from cryptography.exceptions import InvalidSignature, InvalidTag
-import binascii
+from cryptography.exceptions import InvalidTag
+from contextlib import redirect_stdout
+import io
 import os
 import struct
+import sys
+from typing import Optional
+
+# Key exchange (X25519 + HKDF, Ed25519-signed DH keys) is Phase 3's; reuse it.
+from phases.phase3_auth.authenticated_dh import AuthenticatedParticipant as _Phase3Participant
+
+
+class AuthenticatedParticipant(_Phase3Participant):
+    # Phase 3's participant, plus a cached signature over our DH key: a channel
+    # hands out get_public_keys() on every (re)connect.
+
+    __slots__ = ("_cached_sig",)
 
-def public_bytes(public_key):
-    # Serialize an X25519 public key to raw bytes (32 bytes).
-    return public_key.public_bytes(
-        encoding=serialization.Encoding.Raw,
-        format=serialization.PublicFormat.Raw
-    )
-
-def derive_shared_key(our_private: x25519.X25519PrivateKey, their_public_bytes: bytes, info: bytes = b"secure_channel_v1"):
-    # Derive shared key from DH exchange.
-    their_public = x25519.X25519PublicKey.from_public_bytes(their_public_bytes)
-    shared_secret = our_private.exchange(their_public)
-    hkdf = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=info,
-    )
-    key = hkdf.derive(shared_secret)
-    return key
-
-class AuthenticatedParticipant:
-    # Participant with authentication (Ed25519 signatures)
-    
     def __init__(self, name):
-        self.name = name
-        self.dh_private = None
-        self.dh_public = None
-        self.dh_public_bytes = None
-        self.signing_private = None
-        self.signing_public = None
-        self.signing_public_bytes = None
-        self.shared_key = None
-    
+        super().__init__(name)
+        self._cached_sig = None  # signature over the current dh_public_bytes
+
     def generate_keypairs(self):
-        # Generate both DH and Ed25519 keypairs
-        from cryptography.hazmat.primitives.asymmetric import x25519, ed25519
-        from cryptography.hazmat.primitives import serialization
-        self.dh_private = x25519.X25519PrivateKey.generate()
-        self.dh_public = self.dh_private.public_key()
-        self.dh_public_bytes = public_bytes(self.dh_public)
-        self.signing_private = ed25519.Ed25519PrivateKey.generate()
-        self.signing_public = self.signing_private.public_key()
-        self.signing_public_bytes = self.signing_public.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
-    
+        super().generate_keypairs()
+        self._cached_sig = None
+
     def sign_dh_public_key(self):
-        # Sign the DH public key with Ed25519 private key
-        return self.signing_private.sign(self.dh_public_bytes)
-    
-    def verify_and_derive_key(self, peer_dh_pub_bytes, peer_signing_pub_bytes, signature):
-        # Verify the peer's signature and derive shared key if valid
-        try:
-            peer_signing_pub = ed25519.Ed25519PublicKey.from_public_bytes(peer_signing_pub_bytes)
-            peer_signing_pub.verify(signature, peer_dh_pub_bytes)
-            self.shared_key = derive_shared_key(self.dh_private, peer_dh_pub_bytes)
-            return True, self.shared_key
-        except InvalidSignature:
-            return False, None
+        # Ed25519 is deterministic, so the signature is reused until the keys change.
+        if self._cached_sig is None:
+            self._cached_sig = super().sign_dh_public_key()
+        return self._cached_sig
+
+    def clear_keys(self):
+        super().clear_keys()
+        self._cached_sig = None
+
+
+NONCE_PREFIX_LOW = b"\x00\x00\x00\x00"
+NONCE_PREFIX_HIGH = b"\x00\x00\x00\x01"
+
+
+FRAME_HEADER_LEN = 4 + 12  # ciphertext length + nonce
+
+# Precompiled formats: 4-byte big-endian lengths (frames, batched records) and
+# the 8-byte big-endian message counter at nonce[4:12].
+_LEN_PREFIX = struct.Struct('>I')
+_NONCE_COUNTER = struct.Struct('>Q')
+
+# RFC 8439 layout: the 96-bit nonce is ours (prefix + message counter) and the
+# 32-bit block counter belongs to the cipher, starting at 1 (block 0 makes the
+# Poly1305 key). That caps one message at (2^32 - 1) blocks of 64 bytes; past it
+# the block counter would wrap and reuse keystream.
+MAX_PLAINTEXT_LEN = (2**32 - 1) * 64
+
+
+class ReplayError(ValueError):
+    # Raised when a message reuses a nonce we've already accepted.
+    pass
 
 
 class SecureChannel:
     # Secure channel using authenticated key exchange + AEAD.
     
-    def __init__(self, name):
+    def __init__(self, name, verbose=False):
         self.name = name
+        self.verbose = verbose  # per-message logging; keep off outside the demo
         self.participant = AuthenticatedParticipant(name)
         self.cipher = None
+        self._key = None
         self.nonce_counter = 0
-        self.peer_nonce_counter = 0
+        self._nonce_buf = bytearray(12)
+        self._peer_nonce_prefix = None
+        self.peer_nonce_counter = 0  # next counter value we accept from the peer
     
     def establish_channel(self, peer_dh_pub_bytes, peer_signing_pub_bytes, peer_signature):
         # Verify peer, derive shared key, then init the AEAD cipher.
@@ -94,9 +87,48 @@ class SecureChannel:
         
         if not valid:
             return False
+        return self._install_key(shared_key, peer_dh_pub_bytes)
+
+    def establish_verified_channel(self, peer_dh_pub_bytes) -> bool:
+        # establish_channel for a peer the caller has already authenticated
+        # (signature checked elsewhere): derive the shared key, then init the
+        # AEAD cipher. False if the DH public key yields no usable key.
+        try:
+            shared_key = self.participant.derive_key_for_verified_peer(peer_dh_pub_bytes)
+        except ValueError:
+            return False
+        return self._install_key(shared_key, peer_dh_pub_bytes)
 
+    def _install_key(self, shared_key, peer_dh_pub_bytes):
+        # Set the channel up for a verified peer's shared key.
+        if shared_key == self._key:
+            # Resumed session with the same key: keep the counters running so
+            # no nonce is ever reused under this key.
+            if self.verbose:
+                print(f"{self.name}: Secure channel resumed with existing key.")
+            return True
+
+        self._key = shared_key
+        # One AEAD object per key: it holds the initialized cipher context, so
+        # encrypt/decrypt calls reuse it instead of setting one up per message.
         self.cipher = ChaCha20Poly1305(shared_key)
-        print(f"{self.name}: Secure channel established. AEAD cipher initialized.")
+
+        # Both directions share one key, so each side gets its own 4-byte nonce
+        # prefix (0 or 1, by ordering of the DH public keys) to keep the two
+        # counter streams from ever producing the same nonce.
+        we_are_low = self.participant.dh_public_bytes < peer_dh_pub_bytes
+        self._nonce_buf[0:4] = NONCE_PREFIX_LOW if we_are_low else NONCE_PREFIX_HIGH
+        self._peer_nonce_prefix = NONCE_PREFIX_HIGH if we_are_low else NONCE_PREFIX_LOW
+        self.nonce_counter = 0
+        self.peer_nonce_counter = 0
+
+        # Swap in a send_message specialised for this key (unless a subclass
+        # has its own send_message to keep).
+        if type(self).send_message is SecureChannel.send_message:
+            self.send_message = _make_fast_send(self)
+
+        if self.verbose:
+            print(f"{self.name}: Secure channel established. AEAD cipher initialized.")
         return True
     
     def send_message(self, plaintext: bytes, associated_data: bytes = b"") -> tuple[bytes, bytes]:
@@ -104,30 +136,172 @@ class SecureChannel:
         if self.cipher is None:
             raise ValueError("Channel not established - call establish_channel() first")
         
-        # Nonce must be unique per key. We use counter + random.
-        nonce = struct.pack('>Q', self.nonce_counter) + os.urandom(4)
-        self.nonce_counter += 1
+        nonce = self._next_nonce()
 
-        ciphertext = self.cipher.encrypt(nonce, plaintext, associated_data)
+        ciphertext = self._encrypt(nonce, plaintext, associated_data)
         
-        print(f"{self.name}: Encrypted message (length: {len(ciphertext)} bytes)")
-        print(f"{self.name}: Nonce (hex): {binascii.hexlify(nonce).decode()}")
+        if self.verbose:
+            print(f"{self.name}: Encrypted message (length: {len(ciphertext)} bytes)")
+            print(f"{self.name}: Nonce (hex): {nonce.hex()}")
         
         return ciphertext, nonce
     
-    def receive_message(self, ciphertext: bytes, nonce: bytes, associated_data: bytes = b"") -> bytes:
-        # Decrypt and verify a message. Raises InvalidTag on tampering/wrong key.
+    def send_messages(self, plaintexts: list[bytes], associated_data: bytes = b"") -> tuple[bytes, bytes]:
+        # Encrypt several messages as one AEAD record (one nonce, one tag).
+        # Each message is framed with a 4-byte big-endian length prefix.
+        if self.cipher is None:
+            raise ValueError("Channel not established - call establish_channel() first")
+
+        buf = bytearray()
+        for m in plaintexts:
+            buf += _LEN_PREFIX.pack(len(m))
+            buf += m
+
+        nonce = self._next_nonce()
+        ciphertext = self._encrypt(nonce, buf, associated_data)
+
+        if self.verbose:
+            print(f"{self.name}: Encrypted {len(plaintexts)} messages in one record (length: {len(ciphertext)} bytes)")
+        return ciphertext, nonce
+
+    def send_frame(self, plaintext: bytes, associated_data: bytes = b"") -> bytearray:
+        # Encrypt into a ready-to-send wire frame: length (4B) || nonce (12B) || ciphertext.
+        # Built in one buffer, so a socket can sendall() it without further concatenation.
+        if self.cipher is None:
+            raise ValueError("Channel not established - call establish_channel() first")
+
+        if len(plaintext) > MAX_PLAINTEXT_LEN:
+            raise ValueError("Message too long for a single ChaCha20-Poly1305 nonce")
+        nonce = self._next_nonce()
+        ct_len = len(plaintext) + 16
+        frame = bytearray(FRAME_HEADER_LEN + ct_len)
+        _LEN_PREFIX.pack_into(frame, 0, ct_len)
+        frame[4:FRAME_HEADER_LEN] = nonce
+        if hasattr(self.cipher, "encrypt_into"):
+            self.cipher.encrypt_into(nonce, plaintext, associated_data, memoryview(frame)[FRAME_HEADER_LEN:])
+        else:
+            frame[FRAME_HEADER_LEN:] = self.cipher.encrypt(nonce, plaintext, associated_data)
+
+        if self.verbose:
+            print(f"{self.name}: Encrypted frame (length: {len(frame)} bytes)")
+        return frame
+
+    def send_message_into(self, plaintext: bytes, out, associated_data: bytes = b"") -> bytes:
+        # Encrypt straight into a caller-owned writable buffer (bytearray,
+        # memoryview, mmap...) of at least len(plaintext) + 16 bytes; the first
+        # len(plaintext) + 16 bytes become ciphertext || tag. Returns the nonce.
+        # With a buffer reused across messages nothing is allocated per message
+        # apart from the nonce.
+        if self.cipher is None:
+            raise ValueError("Channel not established - call establish_channel() first")
+        if len(plaintext) > MAX_PLAINTEXT_LEN:
+            raise ValueError("Message too long for a single ChaCha20-Poly1305 nonce")
+        size = len(plaintext) + 16
+        view = memoryview(out)
+        if view.nbytes < size:
+            raise ValueError(f"Output buffer too small: need {size} bytes")
+
+        nonce = self._next_nonce()
+        if hasattr(self.cipher, "encrypt_into"):
+            self.cipher.encrypt_into(nonce, plaintext, associated_data, view[:size])
+        else:
+            view[:size] = self.cipher.encrypt(nonce, plaintext, associated_data)
+
+        if self.verbose:
+            print(f"{self.name}: Encrypted message into buffer (length: {size} bytes)")
+        return nonce
+
+    def receive_frame(self, frame, associated_data: bytes = b"") -> bytes:
+        # Decrypt a frame produced by send_frame().
+        if len(frame) < FRAME_HEADER_LEN:
+            raise ValueError("Truncated frame")
+        view = memoryview(frame)
+        (ct_len,) = _LEN_PREFIX.unpack_from(view, 0)
+        if len(view) != FRAME_HEADER_LEN + ct_len:
+            raise ValueError("Frame length mismatch")
+        nonce = bytes(view[4:FRAME_HEADER_LEN])
+        return self.receive_message(view[FRAME_HEADER_LEN:], nonce, associated_data)
+
+    def receive_messages(self, ciphertext: bytes, nonce: bytes, associated_data: bytes = b"") -> list[bytes]:
+        # Decrypt a record from send_messages() and split it back into messages.
+        plaintext = self.receive_message(ciphertext, nonce, associated_data)
+
+        view = memoryview(plaintext)
+        messages = []
+        offset = 0
+        while offset < len(view):
+            if offset + 4 > len(view):
+                raise ValueError("Truncated message frame")
+            (length,) = _LEN_PREFIX.unpack_from(view, offset)
+            offset += 4
+            if offset + length > len(view):
+                raise ValueError("Truncated message frame")
+            messages.append(bytes(view[offset:offset + length]))
+            offset += length
+        return messages
+
+    def _encrypt(self, nonce: bytes, plaintext: bytes, associated_data: bytes) -> bytes:
+        # Plain encrypt(): the returned bytes are the one allocation either way.
+        # Callers with their own buffer use send_message_into instead.
+        if len(plaintext) > MAX_PLAINTEXT_LEN:
+            raise ValueError("Message too long for a single ChaCha20-Poly1305 nonce")
+        return self.cipher.encrypt(nonce, plaintext, associated_data)
+
+    def _next_nonce(self) -> bytes:
+        # Nonce must be unique per key: direction prefix (4B) || counter (8B),
+        # the RFC 7539 layout. No randomness needed, and the receiver can use
+        # the counter for replay detection.
+        _NONCE_COUNTER.pack_into(self._nonce_buf, 4, self.nonce_counter)
+        self.nonce_counter += 1
+        return bytes(self._nonce_buf)
+
+    def receive_message(self, ciphertext, nonce: bytes, associated_data: bytes = b"") -> bytes:
+        # Decrypt and verify a message. Raises InvalidTag on tampering/wrong key,
+        # ReplayError on a replayed (or reflected) message. ciphertext can be any
+        # buffer (bytes, bytearray, memoryview) - it's passed through uncopied.
         if self.cipher is None:
             raise ValueError("Channel not established - call establish_channel() first")
         
         try:
             plaintext = self.cipher.decrypt(nonce, ciphertext, associated_data)
-            print(f"{self.name}: Decrypted message successfully")
-            return plaintext
-            
         except InvalidTag:
-            print(f"{self.name}: [FAILED] Decryption FAILED - Authentication tag invalid (tampering detected)")
+            if self.verbose:
+                print(f"{self.name}: [FAILED] Decryption FAILED - Authentication tag invalid (tampering detected)")
             raise
+
+        # Only authenticated nonces get here, so a forged one can't advance the counter.
+        if not self._accept_nonce(nonce):
+            if self.verbose:
+                print(f"{self.name}: [FAILED] Replayed or reflected message rejected")
+            raise ReplayError("Nonce already used or not from peer - possible replay")
+
+        if self.verbose:
+            print(f"{self.name}: Decrypted message successfully")
+        return plaintext
+
+    def try_receive_message(self, ciphertext, nonce: bytes, associated_data: bytes = b"") -> Optional[bytes]:
+        # Like receive_message, but returns None instead of raising on a bad tag
+        # or replayed nonce, and never logs. For hot paths where failures are
+        # expected (e.g. attack traffic) and an exception per message would cost
+        # more than the decrypt.
+        if self.cipher is None:
+            raise ValueError("Channel not established - call establish_channel() first")
+        try:
+            plaintext = self.cipher.decrypt(nonce, ciphertext, associated_data)
+        except InvalidTag:
+            return None
+        if not self._accept_nonce(nonce):
+            return None
+        return plaintext
+
+    def _accept_nonce(self, nonce: bytes) -> bool:
+        # Replay check for an authenticated nonce: it must carry the peer's
+        # prefix and a counter we haven't seen yet.
+        counter = int.from_bytes(nonce[4:], 'big')
+        if nonce[:4] != self._peer_nonce_prefix or counter < self.peer_nonce_counter:
+            return False
+        self.peer_nonce_counter = counter + 1
+        return True
     
     def get_public_keys(self):
         # Get public keys and signature for key exchange
@@ -138,8 +312,85 @@ class SecureChannel:
             signature
         )
 
+    def close(self):
+        # Tear the channel down and drop every secret it holds: the AEAD
+        # context, the shared key (and the participant's per-peer key cache),
+        # the DH and signing private keys. Our nonce buffer is wiped in
+        # place. Key material held in immutable bytes can't be overwritten from
+        # Python, so dropping the last reference is the best we can do for it.
+        # After close() the channel needs generate_keypairs() + establish_channel()
+        # again before use.
+        self.__dict__.pop("send_message", None)  # fast-path closure holds the cipher
+        self.cipher = None
+        self._key = None
+        self._nonce_buf[:] = bytes(12)
+        self._peer_nonce_prefix = None
+
+        self.participant.clear_keys()
+
+        if self.verbose:
+            print(f"{self.name}: Secure channel closed, keys released.")
+
+
+def _make_fast_send(channel):
+    # Build send_message for one established channel with the cipher, nonce
+    # buffer and helpers bound as closure locals, so the per-message path skips
+    # the self.cipher / self._next_nonce / self._encrypt attribute lookups.
+    # nonce_counter stays on the channel so send_frame/send_messages share it.
+    encrypt = channel.cipher.encrypt
+    nonce_buf = channel._nonce_buf
+    pack_into = _NONCE_COUNTER.pack_into
+    slow_send = SecureChannel.send_message
+
+    def send_message(plaintext: bytes, associated_data: bytes = b"") -> tuple[bytes, bytes]:
+        if channel.verbose or len(plaintext) > MAX_PLAINTEXT_LEN:
+            return slow_send(channel, plaintext, associated_data)
+        pack_into(nonce_buf, 4, channel.nonce_counter)
+        channel.nonce_counter += 1
+        nonce = bytes(nonce_buf)
+        return encrypt(nonce, plaintext, associated_data), nonce
+
+    return send_message
+
+
+def establish_channels_batch(channels, peer_bundles):
+    # Establish many channels at once (e.g. a server accepting a burst of clients).
+    # peer_bundles[i] is the (dh_pub, signing_pub, signature) tuple for channels[i].
+    # Returns one bool per channel. Verification is serial: neither cryptography
+    # nor PyNaCl exposes Ed25519 batch verification.
+    if len(channels) != len(peer_bundles):
+        raise ValueError("Need one peer bundle per channel")
+    return [
+        channel.establish_channel(*bundle)
+        for channel, bundle in zip(channels, peer_bundles)
+    ]
+
+
+def broadcast_message(channels, plaintext: bytes, associated_data: bytes = b""):
+    # Encrypt the same plaintext for many peers; returns one (ciphertext, nonce)
+    # per channel, in order. A plain loop: for chat-sized messages each encrypt
+    # takes microseconds, so a thread pool's hand-off costs more than it saves
+    # (it only broke even around 1 MiB payloads).
+    # A channel must appear only once (each send advances its nonce counter).
+    if len(set(map(id, channels))) != len(channels):
+        raise ValueError("Each channel may appear only once in a broadcast")
+    return [ch.send_message(plaintext, associated_data) for ch in channels]
+
 
 def demonstrate_secure_channel():
+    # Run the demo with its output collected in memory and written out in one
+    # go (one write instead of one per print); partial output still appears
+    # if a step raises.
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            _run_secure_channel_demo()
+    finally:
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
+
+def _run_secure_channel_demo():
     #
     # Demonstrate complete secure channel with authenticated encryption
     #
@@ -149,8 +400,8 @@ def demonstrate_secure_channel():
     print()
     
     # Create secure channels
-    alice_channel = SecureChannel("Alice")
-    bob_channel = SecureChannel("Bob")
+    alice_channel = SecureChannel("Alice", verbose=True)
+    bob_channel = SecureChannel("Bob", verbose=True)
     
     print("\n" + "-" * 70)
     print("STEP 1: Alice generates keypairs")
@@ -241,7 +492,7 @@ def demonstrate_secure_channel():
     
     print("\nBob tries to decrypt tampered message...")
     try:
-        bob_channel.receive_message(bytes(tampered_ciphertext), nonce)
+        bob_channel.receive_message(tampered_ciphertext, nonce)
         print("[ERROR] Tampering should have been detected!")
     except InvalidTag:
         print("[SUCCESS] Tampering detected! Message rejected.")
@@ -261,6 +512,54 @@ This will be demonstrated in Phase 5.
 """)
 
 
+def benchmark_secure_channel(n_messages=10000, message_size=64):
+    # Throughput check for the channel (run with --bench): encrypt, decrypt,
+    # and tamper-detect n_messages random messages, then report MB/s.
+    import time
+    import numpy as np
+
+    alice_channel = SecureChannel("Alice")
+    bob_channel = SecureChannel("Bob")
+    alice_channel.participant.generate_keypairs()
+    bob_channel.participant.generate_keypairs()
+    bob_channel.establish_channel(*alice_channel.get_public_keys())
+    alice_channel.establish_channel(*bob_channel.get_public_keys())
+
+    blob = os.urandom(n_messages * message_size)
+    messages = [blob[i:i + message_size] for i in range(0, len(blob), message_size)]
+    total_mb = len(blob) / 1e6
+
+    start = time.perf_counter()
+    sent = [alice_channel.send_message(m) for m in messages]
+    encrypt_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ciphertext, nonce in sent:
+        bob_channel.receive_message(ciphertext, nonce)
+    decrypt_s = time.perf_counter() - start
+
+    # Tamper with one random byte of every ciphertext in a single vectorized pass.
+    ct_len = message_size + 16
+    tampered = np.frombuffer(b"".join(ct for ct, _ in sent), dtype=np.uint8).reshape(n_messages, ct_len).copy()
+    positions = np.random.randint(0, ct_len, size=n_messages)
+    tampered[np.arange(n_messages), positions] ^= 0xFF
+
+    detected = 0
+    start = time.perf_counter()
+    for row, (_, nonce) in zip(tampered, sent):
+        if bob_channel.try_receive_message(row, nonce) is None:
+            detected += 1
+    tamper_s = time.perf_counter() - start
+
+    print(f"{n_messages} messages x {message_size} bytes")
+    print(f"  encrypt: {total_mb / encrypt_s:8.1f} MB/s")
+    print(f"  decrypt: {total_mb / decrypt_s:8.1f} MB/s")
+    print(f"  tamper : {total_mb / tamper_s:8.1f} MB/s ({detected}/{n_messages} rejected)")
+
+
 if __name__ == "__main__":
-    demonstrate_secure_channel()
+    if "--bench" in sys.argv:
+        benchmark_secure_channel()
+    else:
+        demonstrate_secure_channel()
 
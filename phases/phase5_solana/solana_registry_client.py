@@ -3,173 +3,645 @@
 # In the real world this would talk to a deployed program; here it's mostly stubbed
 # out for the project walkthrough.
 
+import asyncio
 import base64
+import functools
+import hmac
 import json
-from typing import Optional, Tuple
+import logging
+import os
+import shelve
+import sys
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+import numpy as np
+from typing import Optional, Sequence, Tuple, Union
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
-from solders.rpc.responses import GetAccountInfoResp
-from solders.system_program import ID as SYSTEM_PROGRAM_ID
-from anchorpy import Program, Provider, Wallet
-from anchorpy.provider.anchor import AnchorProvider
-from anchorpy.idl import Idl
+import httpx
 import solana.rpc.api as solana_api
+try:
+    import h2  # optional: lets httpx speak HTTP/2
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+from cryptography.exceptions import InvalidSignature
+
+# Ed25519 key loading (Phase 3) and the secure channel (Phase 4)
+from phases.phase3_auth.authenticated_dh import load_signing_public_key
+from phases.phase4_aead.secure_channel import SecureChannel
+
+
+# Client-side trace (PDAs, lookups, results). Silent unless DEBUG is enabled;
+# the demo below turns it on.
+log = logging.getLogger(__name__)
+
+# KeyRecord account layout (Anchor): 8-byte discriminator, then the struct
+# fields in IDL order - owner (32), public_key (32), bump (1).
+KEY_RECORD_DISCRIMINATOR_LEN = 8
+KEY_RECORD_LEN = KEY_RECORD_DISCRIMINATOR_LEN + 32 + 32 + 1
+
+# First PDA seed of every KeyRecord; the owner's address is the second.
+_KEY_RECORD_SEED = b"key_record"
+
+# getMultipleAccounts accepts at most 100 addresses per call.
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+# verify_key's cache of fetched key records: how long an entry is trusted, and
+# how many are kept.
+ACCOUNT_CACHE_TTL = 30.0
+ACCOUNT_CACHE_SIZE = 1024
+
+# Keep-alive pool for the hot-path RPC client, so repeated lookups reuse one
+# TCP/TLS connection instead of handshaking each time.
+RPC_KEEPALIVE_CONNECTIONS = 8
+RPC_KEEPALIVE_EXPIRY = 30.0
+
+# Hedged lookups (verify_key_hedged): rounds before giving up, base delay
+# between rounds (doubled each time), and how long an endpoint that answered
+# 429 Too Many Requests is left out.
+RPC_HEDGE_ATTEMPTS = 3
+RPC_HEDGE_BACKOFF = 0.25
+RPC_RATE_LIMIT_COOLDOWN = 10.0
+
+# Suggested location for the optional on-disk PDA cache (pda_cache_path).
+DEFAULT_PDA_CACHE_PATH = "~/.cache/uomcrypto/pda.db"
+
+
+# Minimal IDL-like description of the key_registry program (demo only). Shared,
+# read-only, by every client instead of being rebuilt per instance.
+_IDL = MappingProxyType({
+    "version": "0.1.0",
+    "name": "key_registry",
+    "instructions": [
+        {
+            "name": "registerKey",
+            "accounts": [
+                {"name": "owner", "isMut": True, "isSigner": True},
+                {"name": "keyRecord", "isMut": True, "isSigner": False},
+                {"name": "systemProgram", "isMut": False, "isSigner": False}
+            ],
+            "args": [{"name": "publicKey", "type": {"array": ["u8", 32]}}]
+        },
+        {
+            "name": "updateKey",
+            "accounts": [
+                {"name": "owner", "isMut": True, "isSigner": True},
+                {"name": "keyRecord", "isMut": True, "isSigner": False}
+            ],
+            "args": [{"name": "newPublicKey", "type": {"array": ["u8", 32]}}]
+        },
+        {
+            "name": "verifyKey",
+            "accounts": [
+                {"name": "keyRecord", "isMut": False, "isSigner": False}
+            ],
+            "args": [{"name": "publicKeyToVerify", "type": {"array": ["u8", 32]}}],
+            "returns": "bool"
+        }
+    ],
+    "accounts": [
+        {
+            "name": "KeyRecord",
+            "type": {
+                "kind": "struct",
+                "fields": [
+                    {"name": "owner", "type": "publicKey"},
+                    {"name": "publicKey", "type": {"array": ["u8", 32]}},
+                    {"name": "bump", "type": "u8"}
+                ]
+            }
+        }
+    ]
+})
+
+
+def _decode_key_record(data: bytes) -> Optional[Tuple[bytes, bytes]]:
+    # Return (owner, public_key) from raw KeyRecord account data, or None if malformed.
+    if len(data) < KEY_RECORD_LEN:
+        return None
+    owner_start = KEY_RECORD_DISCRIMINATOR_LEN
+    key_start = owner_start + 32
+    return data[owner_start:key_start], data[key_start:key_start + 32]
 
-# Import secure channel components
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'phase5_aead'))
-from secure_channel import SecureChannel
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    # True if an RPC failure (or anything it wraps) was an HTTP 429.
+    while exc is not None:
+        response = getattr(exc, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _key_record_matches(data: bytes, owner_bytes: bytes, expected_key: bytes) -> bool:
+    # True if the KeyRecord in `data` belongs to owner_bytes and stores expected_key.
+    # Constant-time compares, and both always run (no early exit on the owner).
+    record = _decode_key_record(data)
+    if record is None:
+        return False
+    stored_owner, stored_key = record
+    owner_ok = hmac.compare_digest(stored_owner, owner_bytes)
+    key_ok = hmac.compare_digest(stored_key, expected_key)
+    return owner_ok and key_ok
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_pubkey(address: str) -> Pubkey:
+    # Base58-decode an owner address. The same peers are looked up over and
+    # over, so the decoded Pubkey is cached (invalid addresses still raise).
+    return Pubkey.from_string(address)
+
+
+@functools.lru_cache(maxsize=4096)
+def _find_key_record_pda(owner_pubkey_bytes: bytes, program_id_bytes: bytes) -> Tuple[Pubkey, int]:
+    # find_program_address walks bump seeds down from 255, hashing each try
+    # (SHA-256), until it lands off-curve. The result never changes for a given
+    # owner/program, so repeat lookups just hit the cache.
+    seeds = [_KEY_RECORD_SEED, owner_pubkey_bytes]
+    return Pubkey.find_program_address(seeds, Pubkey.from_bytes(program_id_bytes))
 
 
 class SolanaKeyRegistryClient:
     # Client wrapper for the (demo) Solana key registry program.
     
-    def __init__(self, rpc_url: str = "https://api.devnet.solana.com", program_id: Optional[str] = None):
+    def __init__(self, rpc_url: str = "https://api.devnet.solana.com", program_id: Optional[str] = None,
+                 account_cache_ttl: float = ACCOUNT_CACHE_TTL, fallback_rpc_urls: Sequence[str] = (),
+                 pda_cache_path: Optional[str] = None):
         # Create a client for a given RPC endpoint and program id.
+        # account_cache_ttl: seconds a fetched key record is reused by verify_key
+        # (0 disables the cache).
+        # fallback_rpc_urls: extra endpoints raced against rpc_url by verify_key_hedged.
+        # pda_cache_path: shelve file that keeps derived PDAs across runs
+        # (e.g. DEFAULT_PDA_CACHE_PATH); None keeps them in memory only.
         self.rpc_url = rpc_url
+        self.rpc_urls = (rpc_url, *fallback_rpc_urls)
         self.connection = solana_api.Client(rpc_url)
+        self._async_clients = {}  # url -> AsyncClient, created on first async call
+        self._rate_limited_until = {}  # url -> monotonic time it may be used again
+
+        # PDA bytes -> (expiry, raw KeyRecord data), oldest first. Only records
+        # that exist are cached, so a fresh registration is seen immediately;
+        # a rotated key is picked up once its entry expires.
+        self.account_cache_ttl = account_cache_ttl
+        self._account_cache = OrderedDict()
+        self.account_cache_hits = 0
+        self.account_cache_misses = 0
+
+        # Hot-path getAccountInfo goes over a plain keep-alive HTTP client with a
+        # prebuilt request body (see _get_account_info_raw). HTTP/2 is used
+        # when the h2 package is installed (httpx[http2]).
+        self._http = httpx.Client(
+            timeout=10.0,
+            http2=_HTTP2,
+            limits=httpx.Limits(
+                max_keepalive_connections=RPC_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=RPC_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._get_account_info_tmpl = (
+            b'{"jsonrpc":"2.0","id":1,"method":"getAccountInfo",'
+            b'"params":["__PDA__",{"encoding":"base64"}]}'
+        )
         self.program_id = Pubkey.from_string(program_id or "KeyRegistry11111111111111111111111111111")
         
-        self.idl = self._load_idl()
+        self.idl = _IDL
+
+        self._pda_shelf = None
+        self._pda_memo = {}
+        if pda_cache_path is not None:
+            pda_cache_path = os.path.expanduser(pda_cache_path)
+            os.makedirs(os.path.dirname(pda_cache_path) or ".", exist_ok=True)
+            self._pda_shelf = shelve.open(pda_cache_path)
         
-        print(f"Solana Key Registry Client initialized")
-        print(f"RPC URL: {rpc_url}")
-        print(f"Program ID: {self.program_id}")
-    
-    def _load_idl(self) -> dict:
-        # Return a minimal IDL-like dict (demo only).
-        return {
-            "version": "0.1.0",
-            "name": "key_registry",
-            "instructions": [
-                {
-                    "name": "registerKey",
-                    "accounts": [
-                        {"name": "owner", "isMut": True, "isSigner": True},
-                        {"name": "keyRecord", "isMut": True, "isSigner": False},
-                        {"name": "systemProgram", "isMut": False, "isSigner": False}
-                    ],
-                    "args": [{"name": "publicKey", "type": {"array": ["u8", 32]}}]
-                },
-                {
-                    "name": "updateKey",
-                    "accounts": [
-                        {"name": "owner", "isMut": True, "isSigner": True},
-                        {"name": "keyRecord", "isMut": True, "isSigner": False}
-                    ],
-                    "args": [{"name": "newPublicKey", "type": {"array": ["u8", 32]}}]
-                },
-                {
-                    "name": "verifyKey",
-                    "accounts": [
-                        {"name": "keyRecord", "isMut": False, "isSigner": False}
-                    ],
-                    "args": [{"name": "publicKeyToVerify", "type": {"array": ["u8", 32]}}],
-                    "returns": "bool"
-                }
-            ],
-            "accounts": [
-                {
-                    "name": "KeyRecord",
-                    "type": {
-                        "kind": "struct",
-                        "fields": [
-                            {"name": "owner", "type": "publicKey"},
-                            {"name": "publicKey", "type": {"array": ["u8", 32]}},
-                            {"name": "bump", "type": "u8"}
-                        ]
-                    }
-                }
-            ]
-        }
+        log.debug("Solana Key Registry Client initialized")
+        log.debug("RPC URL: %s", rpc_url)
+        log.debug("Program ID: %s", self.program_id)
     
     def _derive_key_record_pda(self, owner_pubkey: Pubkey) -> Tuple[Pubkey, int]:
-        # Derive the PDA for a user's key record.
-        seeds = [b"key_record", bytes(owner_pubkey)]
-        pda, bump = Pubkey.find_program_address(seeds, self.program_id)
-        return pda, bump
+        # Derive the PDA for a user's key record (cached per owner + program,
+        # and on disk too if a pda_cache_path was given).
+        owner_bytes = bytes(owner_pubkey)
+        if self._pda_shelf is None:
+            return _find_key_record_pda(owner_bytes, bytes(self.program_id))
+
+        # Memory first: a shelf read unpickles from disk, so it only backs
+        # owners not yet seen by this client.
+        cached = self._pda_memo.get(owner_bytes)
+        if cached is not None:
+            return cached
+        shelf_key = bytes(self.program_id).hex() + owner_bytes.hex()
+        entry = self._pda_shelf.get(shelf_key)
+        if entry is not None:
+            cached = Pubkey.from_bytes(entry[0]), entry[1]
+        else:
+            cached = _find_key_record_pda(owner_bytes, bytes(self.program_id))
+            self._pda_shelf[shelf_key] = (bytes(cached[0]), cached[1])
+        self._pda_memo[owner_bytes] = cached
+        return cached
+
+    def close(self):
+        # Release the HTTP session and flush/close the on-disk PDA cache.
+        self._http.close()
+        if self._pda_shelf is not None:
+            self._pda_shelf.close()
+            self._pda_shelf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
     
-    def register_key(self, wallet_keypair: Keypair, ed25519_public_key: bytes) -> str:
-        # Register an Ed25519 public key (stubbed).
-        if len(ed25519_public_key) != 32:
+    def register_key(self, wallet_keypair: Keypair,
+                     ed25519_public_key: Union[bytes, bytearray, memoryview]) -> str:
+        # Register an Ed25519 public key (stubbed). Any bytes-like buffer is
+        # accepted as-is; nothing is copied unless DEBUG logging wants the hex.
+        mv = memoryview(ed25519_public_key)
+        if mv.nbytes != 32 or mv.format != 'B':
             raise ValueError("Ed25519 public key must be 32 bytes")
         
         owner_pubkey = wallet_keypair.pubkey()
         key_record_pda, bump = self._derive_key_record_pda(owner_pubkey)
         
-        print(f"Registering public key for owner: {owner_pubkey}")
-        print(f"Key Record PDA: {key_record_pda}")
-        print(f"Public key (hex): {ed25519_public_key.hex()}")
+        log.debug("Registering public key for owner: %s", owner_pubkey)
+        log.debug("Key Record PDA: %s", key_record_pda)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Public key (hex): %s", mv.hex())
         
-        print("✅ Registration instruction prepared")
-        print("   (In production, this would be sent as a Solana transaction)")
+        log.debug("✅ Registration instruction prepared")
+        log.debug("   (In production, this would be sent as a Solana transaction)")
         
         return "mock_tx_signature_for_demo"
     
     def verify_key(self, owner_pubkey_str: str, ed25519_public_key: bytes) -> bool:
-        # Check whether a key record exists (demo).
-        owner_pubkey = Pubkey.from_string(owner_pubkey_str)
+        # Check that the owner's key record exists and stores this key.
+        owner_pubkey = _parse_pubkey(owner_pubkey_str)
         key_record_pda, _ = self._derive_key_record_pda(owner_pubkey)
         
-        print(f"Verifying public key for owner: {owner_pubkey}")
-        print(f"Checking Key Record PDA: {key_record_pda}")
+        log.debug("Verifying public key for owner: %s", owner_pubkey)
+        log.debug("Checking Key Record PDA: %s", key_record_pda)
         
         try:
-            account_info = self.connection.get_account_info(key_record_pda)
+            data = self._fetch_key_record_data(key_record_pda)
             
-            if account_info.value is None:
-                print("❌ Key record not found on-chain")
+            if data is None:
+                log.debug("❌ Key record not found on-chain")
                 return False
-            
-            print("✅ Key record found on-chain")
-            print("   (In production, would deserialize and compare keys)")
-            
+
+            if not _key_record_matches(data, bytes(owner_pubkey), ed25519_public_key):
+                log.debug("❌ Key record found, but the stored key does not match")
+                return False
+
+            log.debug("✅ Key record found on-chain and stored key matches")
             return True
             
         except Exception as e:
-            print(f"❌ Verification error: {e}")
+            log.warning("❌ Verification error: %s", e)
             return False
 
+    def _fetch_key_record_data(self, pda: Pubkey) -> Optional[bytes]:
+        # Raw KeyRecord account data for a PDA (None if the account doesn't
+        # exist), served from the TTL cache when possible.
+        cache_key = bytes(pda)
+        entry = self._account_cache.get(cache_key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.account_cache_hits += 1
+                return entry[1]
+            del self._account_cache[cache_key]
+        self.account_cache_misses += 1
+
+        account_info = self._get_account_info_raw(pda)
+        if account_info is None:
+            return None
+        data = base64.b64decode(account_info["data"][0])
+        if self.account_cache_ttl > 0:
+            self._account_cache[cache_key] = (time.monotonic() + self.account_cache_ttl, data)
+            if len(self._account_cache) > ACCOUNT_CACHE_SIZE:
+                self._account_cache.popitem(last=False)
+        return data
+
+    def clear_account_cache(self):
+        # Forget all cached key records (e.g. after a known on-chain key rotation).
+        self._account_cache.clear()
+
+    def _get_account_info_raw(self, pda: Pubkey) -> Optional[dict]:
+        # getAccountInfo without the generic client's per-call request building:
+        # the JSON body is a fixed template with only the address spliced in.
+        # Returns the account dict, or None if the account doesn't exist.
+        body = self._get_account_info_tmpl.replace(b"__PDA__", str(pda).encode())
+        response = self._http.post(
+            self.rpc_url, content=body, headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        payload = json.loads(response.content)
+        if "error" in payload:
+            raise RuntimeError(payload["error"].get("message", "RPC error"))
+        return payload["result"]["value"]
+
+    async def verify_key_async(self, owner_pubkey_str: str, ed25519_public_key: bytes) -> bool:
+        # Same check as verify_key, over the async RPC client so several lookups
+        # can be in flight at once (see verify_keys_async).
+        owner_pubkey = _parse_pubkey(owner_pubkey_str)
+        key_record_pda, _ = self._derive_key_record_pda(owner_pubkey)
+
+        try:
+            account_info = await self._async_client(self.rpc_url).get_account_info(key_record_pda)
+        except Exception as e:
+            log.warning("❌ Verification error for %s: %s", owner_pubkey, e)
+            return False
+        return self._check_account_info(account_info, owner_pubkey, ed25519_public_key)
+
+    async def verify_key_hedged(self, owner_pubkey_str: str, ed25519_public_key: bytes) -> bool:
+        # verify_key_async, but the lookup is sent to every endpoint in rpc_urls
+        # at once and the first good answer wins, so one slow or rate-limited
+        # RPC node doesn't set the latency.
+        owner_pubkey = _parse_pubkey(owner_pubkey_str)
+        key_record_pda, _ = self._derive_key_record_pda(owner_pubkey)
+
+        try:
+            account_info = await self._get_account_info_hedged(key_record_pda)
+        except Exception as e:
+            log.warning("❌ Verification error for %s: %s", owner_pubkey, e)
+            return False
+        return self._check_account_info(account_info, owner_pubkey, ed25519_public_key)
+
+    def _async_client(self, url: str):
+        # The AsyncClient for an endpoint, created on first use.
+        client = self._async_clients.get(url)
+        if client is None:
+            # Imported here so sync-only users don't pay for the async stack.
+            from solana.rpc.async_api import AsyncClient
+            client = self._async_clients[url] = AsyncClient(url)
+        return client
+
+    async def _get_account_info_hedged(self, pda: Pubkey):
+        # Race getAccountInfo across the endpoints that aren't cooling down
+        # after a 429; cancel the rest once one succeeds. If every endpoint
+        # fails, back off and try again (RPC_HEDGE_ATTEMPTS rounds in total).
+        last_error = None
+        for attempt in range(RPC_HEDGE_ATTEMPTS):
+            now = time.monotonic()
+            urls = [u for u in self.rpc_urls if self._rate_limited_until.get(u, 0.0) <= now]
+            tasks = {
+                asyncio.ensure_future(self._async_client(url).get_account_info(pda)): url
+                for url in (urls or self.rpc_urls)
+            }
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        last_error = task.exception()
+                        if _is_rate_limited(last_error):
+                            self._rate_limited_until[tasks[task]] = time.monotonic() + RPC_RATE_LIMIT_COOLDOWN
+                        log.debug("RPC %s failed: %s", tasks[task], last_error)
+            finally:
+                for task in pending:
+                    task.cancel()
+            if attempt + 1 < RPC_HEDGE_ATTEMPTS:
+                await asyncio.sleep(RPC_HEDGE_BACKOFF * (2 ** attempt))
+        raise RuntimeError(f"all RPC endpoints failed: {last_error}")
+
+    def _check_account_info(self, account_info, owner_pubkey: Pubkey, ed25519_public_key: bytes) -> bool:
+        # Shared tail of the async verify paths: does the fetched account hold
+        # this owner's key?
+        if account_info.value is None:
+            log.debug("❌ Key record not found on-chain for %s", owner_pubkey)
+            return False
+        if not _key_record_matches(bytes(account_info.value.data), bytes(owner_pubkey), ed25519_public_key):
+            log.debug("❌ Stored key does not match for %s", owner_pubkey)
+            return False
+        log.debug("✅ Key record found on-chain and stored key matches for %s", owner_pubkey)
+        return True
+
+    async def verify_keys_async(self, entries) -> list:
+        # Verify (owner_pubkey_str, ed25519_public_key) pairs concurrently:
+        # N independent lookups take about one RPC round-trip instead of N.
+        return list(await asyncio.gather(
+            *(self.verify_key_async(owner, key) for owner, key in entries)
+        ))
+
+    async def close_async(self):
+        # Close the async RPC clients' HTTP sessions, if any were opened.
+        clients, self._async_clients = self._async_clients, {}
+        for client in clients.values():
+            await client.close()
+
+    def verify_keys_bulk(self, owners, public_keys) -> list:
+        # Verify many owners' keys at once. owners is a sequence of owner
+        # address strings; public_keys is the matching (N, 32) uint8 array (or a
+        # list of 32-byte keys). PDAs are fetched with getMultipleAccounts, up to
+        # 100 per request, so N peers cost ceil(N/100) round-trips instead of N.
+        # Unlike verify_key this decodes each KeyRecord and checks the stored
+        # owner and key.
+        n = len(owners)
+        if len(public_keys) != n:
+            raise ValueError("Need one public key per owner")
+        if isinstance(public_keys, np.ndarray):
+            expected_keys = np.ascontiguousarray(public_keys, dtype=np.uint8)
+            if expected_keys.shape != (n, 32):
+                raise ValueError("public_keys must have shape (N, 32)")
+        else:
+            if any(len(k) != 32 for k in public_keys):
+                raise ValueError("Ed25519 public keys must be 32 bytes")
+            expected_keys = np.frombuffer(b"".join(public_keys), dtype=np.uint8).reshape(n, 32)
+
+        # Parallel (N, 32) arrays: what we expect vs what the chain holds.
+        expected_owners = np.zeros((n, 32), dtype=np.uint8)
+        stored_owners = np.zeros((n, 32), dtype=np.uint8)
+        stored_keys = np.zeros((n, 32), dtype=np.uint8)
+        found = np.zeros(n, dtype=bool)
+
+        lookups = []  # (row, pda)
+        for i, owner_pubkey_str in enumerate(owners):
+            try:
+                owner_pubkey = _parse_pubkey(owner_pubkey_str)
+            except ValueError:
+                continue
+            expected_owners[i] = np.frombuffer(bytes(owner_pubkey), dtype=np.uint8)
+            key_record_pda, _ = self._derive_key_record_pda(owner_pubkey)
+            lookups.append((i, key_record_pda))
+
+        for start in range(0, len(lookups), MAX_ACCOUNTS_PER_REQUEST):
+            chunk = lookups[start:start + MAX_ACCOUNTS_PER_REQUEST]
+            try:
+                response = self.connection.get_multiple_accounts([pda for _, pda in chunk])
+            except Exception as e:
+                log.warning("❌ Bulk verification error: %s", e)
+                continue
+            for (i, _), account in zip(chunk, response.value):
+                if account is None:
+                    continue
+                record = _decode_key_record(bytes(account.data))
+                if record is None:
+                    continue
+                stored_owners[i] = np.frombuffer(record[0], dtype=np.uint8)
+                stored_keys[i] = np.frombuffer(record[1], dtype=np.uint8)
+                found[i] = True
+
+        # XOR every byte and OR-reduce each row: a match is an all-zero row.
+        # Every byte of every row is always compared (no early exit).
+        diff = (stored_owners ^ expected_owners) | (stored_keys ^ expected_keys)
+        return (found & ~diff.any(axis=1)).tolist()
+
+    def verify_keys_batch(self, entries) -> list:
+        # Verify many (owner_pubkey_str, ed25519_public_key, signature, message) entries.
+        # An entry passes if the signature is valid under the key AND the key is
+        # registered for the owner. Signatures are checked first - it's local and
+        # cheap - so forged entries never cost an RPC round-trip. (Serial Ed25519
+        # verify: neither cryptography nor PyNaCl exposes batch verification.)
+        # The survivors are then checked on-chain together via verify_keys_bulk,
+        # i.e. one getMultipleAccounts per 100 peers rather than one RPC each.
+        results = [False] * len(entries)
+        rows, owners, keys = [], [], []
+        for i, (owner_pubkey_str, ed25519_public_key, signature, message) in enumerate(entries):
+            try:
+                load_signing_public_key(ed25519_public_key).verify(signature, message)
+            except (InvalidSignature, ValueError):
+                continue
+            rows.append(i)
+            owners.append(owner_pubkey_str)
+            keys.append(ed25519_public_key)
+
+        if rows:
+            for i, ok in zip(rows, self.verify_keys_bulk(owners, keys)):
+                results[i] = ok
+        return results
+
+    def register_and_verify(self, pairs) -> list:
+        # Register (wallet_keypair, ed25519_public_key) pairs, then read every
+        # record back in one verify_keys_bulk pass instead of one verify_key
+        # round-trip per pair. Returns [(tx_signature, verified), ...].
+        signatures = [self.register_key(wallet, key) for wallet, key in pairs]
+        verified = self.verify_keys_bulk(
+            [str(wallet.pubkey()) for wallet, _ in pairs],
+            [bytes(key) for _, key in pairs],
+        )
+        return list(zip(signatures, verified))
+
 
 class SecureChannelWithBlockchain(SecureChannel):
     # Secure channel with an extra on-chain key check.
     
-    def __init__(self, name: str, solana_address: str, registry_client: SolanaKeyRegistryClient):
+    def __init__(self, name: str, solana_address: str, registry_client: SolanaKeyRegistryClient, verbose: bool = False):
         # Wrap SecureChannel and add a Solana address + registry client.
-        super().__init__(name)
+        super().__init__(name, verbose=verbose)
         self.solana_address = solana_address
         self.registry_client = registry_client
     
     def verify_peer_via_blockchain(self, peer_solana_address: str, peer_signing_pub_bytes: bytes) -> bool:
         # Verify a peer signing key against the registry.
-        print(f"\n{self.name}: Verifying peer's key via Solana blockchain...")
-        print(f"  Peer Solana address: {peer_solana_address}")
-        print(f"  Peer signing key (hex): {peer_signing_pub_bytes.hex()}")
+        if self.verbose:
+            print(f"\n{self.name}: Verifying peer's key via Solana blockchain...")
+            print(f"  Peer Solana address: {peer_solana_address}")
+            print(f"  Peer signing key (hex): {peer_signing_pub_bytes.hex()}")
         
         is_valid = self.registry_client.verify_key(peer_solana_address, peer_signing_pub_bytes)
         
-        if is_valid:
-            print(f"✅ {self.name}: Blockchain verification SUCCESS")
-            print("   Peer's public key matches on-chain registry")
-        else:
-            print(f"❌ {self.name}: Blockchain verification FAILED")
-            print("   Peer's public key does NOT match on-chain registry")
-            print("   Possible MITM attack or key mismatch!")
+        if self.verbose:
+            if is_valid:
+                print(f"✅ {self.name}: Blockchain verification SUCCESS")
+                print("   Peer's public key matches on-chain registry")
+            else:
+                print(f"❌ {self.name}: Blockchain verification FAILED")
+                print("   Peer's public key does NOT match on-chain registry")
+                print("   Possible MITM attack or key mismatch!")
         
         return is_valid
-    
+
+    async def verify_peer_via_blockchain_async(self, peer_solana_address: str, peer_signing_pub_bytes: bytes) -> bool:
+        # verify_peer_via_blockchain over the async RPC client.
+        is_valid = await self.registry_client.verify_key_async(peer_solana_address, peer_signing_pub_bytes)
+        if self.verbose:
+            status = "SUCCESS" if is_valid else "FAILED"
+            print(f"{'✅' if is_valid else '❌'} {self.name}: Blockchain verification {status} for {peer_solana_address}")
+        return is_valid
+
+    async def establish_channel_via_blockchain(self, peer_solana_address: str, peer_dh_pub_bytes: bytes,
+                                               peer_signing_pub_bytes: bytes, peer_signature: bytes) -> bool:
+        # Blockchain check + establish_channel in one step, with the two
+        # overlapped: the on-chain lookup is in flight while the signature is
+        # verified (in a worker thread, so the event loop keeps serving the RPC).
+        # The thread only checks the signature; the shared key is derived and
+        # installed after both pass, so a peer rejected on-chain leaves no key
+        # behind on the participant.
+        on_chain, valid = await asyncio.gather(
+            self.verify_peer_via_blockchain_async(peer_solana_address, peer_signing_pub_bytes),
+            asyncio.to_thread(
+                self._verify_peer_signature,
+                peer_dh_pub_bytes, peer_signing_pub_bytes, peer_signature,
+            ),
+        )
+        if not (on_chain and valid):
+            return False
+        return self.establish_verified_channel(peer_dh_pub_bytes)
+
+    @staticmethod
+    def _verify_peer_signature(peer_dh_pub_bytes: bytes, peer_signing_pub_bytes: bytes,
+                               peer_signature: bytes) -> bool:
+        try:
+            load_signing_public_key(peer_signing_pub_bytes).verify(peer_signature, peer_dh_pub_bytes)
+            return True
+        except (InvalidSignature, ValueError):
+            return False
+
+    async def verify_peers_via_blockchain(self, peers) -> list:
+        # Verify (solana_address, signing_pub_bytes) pairs concurrently, so a
+        # group handshake with N peers waits about one RPC round-trip, not N.
+        if self.verbose:
+            print(f"\n{self.name}: Verifying {len(peers)} peers via Solana blockchain (concurrent)...")
+        return list(await asyncio.gather(
+            *(self.verify_peer_via_blockchain_async(address, key) for address, key in peers)
+        ))
+
+    def verify_peers_batch(self, peers) -> list:
+        # Verify several peers in one pass. Each peer is
+        # (solana_address, dh_pub_bytes, signing_pub_bytes, signature over dh_pub_bytes).
+        if self.verbose:
+            print(f"\n{self.name}: Verifying {len(peers)} peers via Solana blockchain...")
+        results = self.registry_client.verify_keys_batch([
+            (address, signing_pub, signature, dh_pub)
+            for address, dh_pub, signing_pub, signature in peers
+        ])
+        if self.verbose:
+            print(f"{self.name}: {sum(results)}/{len(results)} peers verified")
+        return results
+
     def register_key_on_blockchain(self, wallet_keypair):
         # Register our signing key (demo).
-        print(f"\n{self.name}: Registering signing key on Solana blockchain...")
+        if self.verbose:
+            print(f"\n{self.name}: Registering signing key on Solana blockchain...")
         signing_pub_bytes = self.participant.signing_public_bytes
         
         tx_sig = self.registry_client.register_key(wallet_keypair, signing_pub_bytes)
         
-        print(f"✅ {self.name}: Key registered on-chain")
-        print(f"   Transaction: {tx_sig}")
-        print(f"   Solana address: {self.solana_address}")
-        print(f"   Signing key (hex): {signing_pub_bytes.hex()}")
+        if self.verbose:
+            print(f"✅ {self.name}: Key registered on-chain")
+            print(f"   Transaction: {tx_sig}")
+            print(f"   Solana address: {self.solana_address}")
+            print(f"   Signing key (hex): {signing_pub_bytes.hex()}")
+        return tx_sig
+
+
+# Mock wallets for the demo, created once and reused by every run (the demo
+# never spends from them, so fresh keys per run buy nothing).
+_DEMO_WALLETS = []
+
+
+def _demo_wallets(seeds: Optional[Tuple[bytes, bytes]] = None) -> Tuple[Keypair, Keypair]:
+    # (alice, bob) demo wallets. Pass two 32-byte seeds for deterministic
+    # wallets (e.g. in tests); otherwise a random pair is made on first use.
+    if seeds is not None:
+        return Keypair.from_seed(seeds[0]), Keypair.from_seed(seeds[1])
+    if not _DEMO_WALLETS:
+        _DEMO_WALLETS.extend((Keypair(), Keypair()))
+    return _DEMO_WALLETS[0], _DEMO_WALLETS[1]
 
 
 def demonstrate_blockchain_integration():
@@ -179,15 +651,19 @@ def demonstrate_blockchain_integration():
     print("=" * 70)
     print()
     
-    # Initialize registry client (using devnet for demo)
-    registry_client = SolanaKeyRegistryClient(rpc_url="https://api.devnet.solana.com")
-    
+    # Initialize registry client (using devnet for demo); the with block closes
+    # its HTTP session however the demo ends.
+    with SolanaKeyRegistryClient(rpc_url="https://api.devnet.solana.com") as registry_client:
+        _run_blockchain_demo(registry_client)
+
+
+def _run_blockchain_demo(registry_client):
     # Create secure channels with blockchain integration
     alice_address = "Alice1111111111111111111111111111111111"  # Mock Solana address
     bob_address = "Bob11111111111111111111111111111111111111"   # Mock Solana address
     
-    alice_channel = SecureChannelWithBlockchain("Alice", alice_address, registry_client)
-    bob_channel = SecureChannelWithBlockchain("Bob", bob_address, registry_client)
+    alice_channel = SecureChannelWithBlockchain("Alice", alice_address, registry_client, verbose=True)
+    bob_channel = SecureChannelWithBlockchain("Bob", bob_address, registry_client, verbose=True)
     
     print("\n" + "-" * 70)
     print("STEP 1: Participants generate keypairs")
@@ -199,8 +675,7 @@ def demonstrate_blockchain_integration():
     print("STEP 2: Register keys on Solana blockchain")
     print("-" * 70)
     # In production, use real Solana keypairs
-    mock_alice_wallet = Keypair()  # Mock for demo
-    mock_bob_wallet = Keypair()    # Mock for demo
+    mock_alice_wallet, mock_bob_wallet = _demo_wallets()  # Mock for demo
     
     alice_channel.register_key_on_blockchain(mock_alice_wallet)
     bob_channel.register_key_on_blockchain(mock_bob_wallet)
@@ -291,6 +766,9 @@ decentralized, trustless verification of public keys.
 
 
 if __name__ == "__main__":
+    # Show this module's trace only (not DEBUG from imported libraries/phases).
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    log.setLevel(logging.DEBUG)
     demonstrate_blockchain_integration()
 
 
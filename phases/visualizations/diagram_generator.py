@@ -1,352 +1,561 @@
 # Generate the project diagrams (one image per phase).
+#
+# Each diagram is built in two stages: a build_*_spec function describes it as
+# plain data (axes limits, title, patches, text), and a renderer draws it:
+# render_spec_svg writes SVG markup directly (no matplotlib needed), and
+# render_spec rasterizes the PNG with matplotlib when it is installed.
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from matplotlib.patches import FancyBboxPatch, FancyArrowPatch, ConnectionPatch
-import matplotlib.patheffects as path_effects
+import hashlib
+import inspect
+import json
+import math
+import os
+import shutil
+from xml.sax.saxutils import escape
 
+try:
+    import matplotlib
+    matplotlib.use('Agg')  # we only savefig, so skip loading a GUI backend
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import FancyBboxPatch, FancyArrowPatch, ConnectionPatch
+    import matplotlib.patheffects as path_effects
+except ImportError:
+    matplotlib = None
 
-def create_dh_exchange_diagram():
-    # Create a diagram showing basic DH key exchange between Alice and Bob
-    fig, ax = plt.subplots(1, 1, figsize=(12, 8))
-    ax.set_xlim(0, 10)
-    ax.set_ylim(0, 6)
-    ax.axis('off')
-    
-    # Alice and Bob boxes
-    alice_box = FancyBboxPatch((0.5, 2), 2, 2, boxstyle="round,pad=0.1", 
-                                facecolor='lightblue', edgecolor='blue', linewidth=2)
-    bob_box = FancyBboxPatch((7.5, 2), 2, 2, boxstyle="round,pad=0.1", 
-                              facecolor='lightgreen', edgecolor='green', linewidth=2)
-    ax.add_patch(alice_box)
-    ax.add_patch(bob_box)
-    
-    # Labels
-    ax.text(1.5, 4.5, 'Alice', ha='center', va='center', fontsize=14, weight='bold')
-    ax.text(8.5, 4.5, 'Bob', ha='center', va='center', fontsize=14, weight='bold')
-    
-    # Public keys
-    ax.text(1.5, 3.5, 'g^a (pub)', ha='center', va='center', fontsize=10)
-    ax.text(8.5, 3.5, 'g^b (pub)', ha='center', va='center', fontsize=10)
-    
-    # Arrows showing key exchange
-    arrow1 = FancyArrowPatch((2.5, 3), (7.5, 3.8), 
-                             arrowstyle='->', mutation_scale=20, 
-                             color='blue', linewidth=2, label='Alice → Bob: g^a')
-    arrow2 = FancyArrowPatch((7.5, 2.2), (2.5, 3), 
-                             arrowstyle='->', mutation_scale=20, 
-                             color='green', linewidth=2, label='Bob → Alice: g^b')
-    ax.add_patch(arrow1)
-    ax.add_patch(arrow2)
-    
-    # Shared key
-    ax.text(5, 1, 'Shared Key: g^(ab)', ha='center', va='center', 
-            fontsize=12, weight='bold', style='italic',
-            bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.7))
-    
-    ax.set_title('Phase 1: Basic Diffie-Hellman Key Exchange', fontsize=16, weight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig('visualizations/dh_exchange.png', dpi=300, bbox_inches='tight')
-    print("✅ Saved: visualizations/dh_exchange.png")
-
-
-def create_mitm_attack_diagram():
-    # Create a diagram showing MITM attack
-    fig, ax = plt.subplots(1, 1, figsize=(14, 8))
-    ax.set_xlim(0, 12)
-    ax.set_ylim(0, 8)
-    ax.axis('off')
-    
-    # Alice, Mallory, and Bob boxes
-    alice_box = FancyBboxPatch((0.5, 5), 2, 2, boxstyle="round,pad=0.1", 
-                                facecolor='lightblue', edgecolor='blue', linewidth=2)
-    mallory_box = FancyBboxPatch((4.5, 2), 3, 2, boxstyle="round,pad=0.1", 
-                                 facecolor='lightcoral', edgecolor='red', linewidth=2)
-    bob_box = FancyBboxPatch((9.5, 5), 2, 2, boxstyle="round,pad=0.1", 
-                             facecolor='lightgreen', edgecolor='green', linewidth=2)
-    ax.add_patch(alice_box)
-    ax.add_patch(mallory_box)
-    ax.add_patch(bob_box)
-    
-    # Labels
-    ax.text(1.5, 7, 'Alice', ha='center', va='center', fontsize=14, weight='bold')
-    ax.text(6, 3.5, 'Mallory\n(Attacker)', ha='center', va='center', fontsize=12, weight='bold', color='darkred')
-    ax.text(10.5, 7, 'Bob', ha='center', va='center', fontsize=14, weight='bold')
-    
-    # Attack arrows
-    arrow1 = FancyArrowPatch((2.5, 6), (4.5, 3.5), arrowstyle='->', mutation_scale=20, 
-                             color='blue', linewidth=2)
-    arrow2 = FancyArrowPatch((4.5, 3.5), (9.5, 6.2), arrowstyle='->', mutation_scale=20, 
-                             color='red', linewidth=2, linestyle='--')
-    arrow3 = FancyArrowPatch((9.5, 5.8), (4.5, 2.5), arrowstyle='->', mutation_scale=20, 
-                             color='green', linewidth=2)
-    arrow4 = FancyArrowPatch((4.5, 2.5), (2.5, 6), arrowstyle='->', mutation_scale=20, 
-                             color='red', linewidth=2, linestyle='--')
-    
-    ax.add_patch(arrow1)
-    ax.add_patch(arrow2)
-    ax.add_patch(arrow3)
-    ax.add_patch(arrow4)
-    
-    # Labels on arrows
-    ax.text(3.5, 5.5, 'g^a', ha='center', fontsize=10, color='blue')
-    ax.text(7, 5, 'g^m', ha='center', fontsize=10, color='red', style='italic', weight='bold')
-    ax.text(7, 3.5, 'g^b', ha='center', fontsize=10, color='green')
-    ax.text(3.5, 3.5, 'g^m', ha='center', fontsize=10, color='red', style='italic', weight='bold')
-    
-    # Result boxes
-    result1 = FancyBboxPatch((0.5, 0.5), 2, 1, boxstyle="round,pad=0.1", 
-                             facecolor='yellow', edgecolor='orange', linewidth=1)
-    result2 = FancyBboxPatch((9.5, 0.5), 2, 1, boxstyle="round,pad=0.1", 
-                             facecolor='yellow', edgecolor='orange', linewidth=1)
-    ax.add_patch(result1)
-    ax.add_patch(result2)
-    
-    ax.text(1.5, 1, 'Key: g^(am)', ha='center', va='center', fontsize=10)
-    ax.text(10.5, 1, 'Key: g^(bm)', ha='center', va='center', fontsize=10)
-    
-    # Warning
-    ax.text(6, 0.5, '⚠️ MITM SUCCESS', ha='center', va='center', 
-            fontsize=14, weight='bold', color='red',
-            bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
-    
-    ax.set_title('Phase 2: Man-in-the-Middle Attack', fontsize=16, weight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig('visualizations/mitm_attack.png', dpi=300, bbox_inches='tight')
-    print("✅ Saved: visualizations/mitm_attack.png")
-
-
-def create_authenticated_flow_diagram():
-    # Create a diagram showing authenticated DH with signatures
-    fig, ax = plt.subplots(1, 1, figsize=(14, 10))
-    ax.set_xlim(0, 12)
-    ax.set_ylim(0, 10)
-    ax.axis('off')
-    
-    # Alice and Bob
-    alice_box = FancyBboxPatch((0.5, 6), 2.5, 3, boxstyle="round,pad=0.1", 
-                               facecolor='lightblue', edgecolor='blue', linewidth=2)
-    bob_box = FancyBboxPatch((9, 6), 2.5, 3, boxstyle="round,pad=0.1", 
-                             facecolor='lightgreen', edgecolor='green', linewidth=2)
-    ax.add_patch(alice_box)
-    ax.add_patch(bob_box)
-    
-    ax.text(1.75, 8.5, 'Alice', ha='center', va='center', fontsize=14, weight='bold')
-    ax.text(10.25, 8.5, 'Bob', ha='center', va='center', fontsize=14, weight='bold')
-    
-    # Keys
-    ax.text(1.75, 7.8, 'DH: g^a', ha='center', fontsize=10)
-    ax.text(1.75, 7.3, 'Sign: Ed25519', ha='center', fontsize=10)
-    ax.text(10.25, 7.8, 'DH: g^b', ha='center', fontsize=10)
-    ax.text(10.25, 7.3, 'Sign: Ed25519', ha='center', fontsize=10)
-    
-    # Messages
-    msg1 = FancyBboxPatch((3.5, 8), 3, 0.8, boxstyle="round,pad=0.05", 
-                         facecolor='white', edgecolor='blue', linewidth=1.5)
-    msg2 = FancyBboxPatch((6, 6.5), 3, 0.8, boxstyle="round,pad=0.05", 
-                         facecolor='white', edgecolor='green', linewidth=1.5)
-    ax.add_patch(msg1)
-    ax.add_patch(msg2)
-    
-    ax.text(5, 8.4, '{g^a, sig_a(g^a)}', ha='center', fontsize=11, weight='bold')
-    ax.text(7.5, 6.9, '{g^b, sig_b(g^b)}', ha='center', fontsize=11, weight='bold')
-    
-    # Arrows
-    arrow1 = FancyArrowPatch((3, 8.4), (9, 8.4), arrowstyle='->', mutation_scale=20, 
-                             color='blue', linewidth=2)
-    arrow2 = FancyArrowPatch((9, 6.9), (3, 6.9), arrowstyle='->', mutation_scale=20, 
-                             color='green', linewidth=2)
-    ax.add_patch(arrow1)
-    ax.add_patch(arrow2)
-    
-    # Verification
-    verify1 = FancyBboxPatch((4.5, 4.5), 3, 1, boxstyle="round,pad=0.1", 
-                             facecolor='lightyellow', edgecolor='orange', linewidth=2)
-    verify2 = FancyBboxPatch((4.5, 2.5), 3, 1, boxstyle="round,pad=0.1", 
-                             facecolor='lightyellow', edgecolor='orange', linewidth=2)
-    ax.add_patch(verify1)
-    ax.add_patch(verify2)
-    
-    ax.text(6, 5, 'Bob verifies sig_a(g^a)', ha='center', va='center', fontsize=11)
-    ax.text(6, 3, 'Alice verifies sig_b(g^b)', ha='center', va='center', fontsize=11)
-    
-    # Success
-    ax.text(6, 0.5, '✅ Shared Key: g^(ab) (Verified)', ha='center', va='center', 
-            fontsize=14, weight='bold', color='green',
-            bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8))
-    
-    ax.set_title('Phase 3: Authenticated Diffie-Hellman (MITM Prevented)', 
-                 fontsize=16, weight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig('visualizations/authenticated_flow.png', dpi=300, bbox_inches='tight')
-    print("✅ Saved: visualizations/authenticated_flow.png")
-
-
-def create_secure_channel_diagram():
-    # Create a diagram showing complete secure channel with AEAD
-    fig, ax = plt.subplots(1, 1, figsize=(14, 10))
-    ax.set_xlim(0, 12)
-    ax.set_ylim(0, 10)
-    ax.axis('off')
-    
-    # Alice and Bob
-    alice_box = FancyBboxPatch((0.5, 6), 3, 3, boxstyle="round,pad=0.1", 
-                               facecolor='lightblue', edgecolor='blue', linewidth=2)
-    bob_box = FancyBboxPatch((8.5, 6), 3, 3, boxstyle="round,pad=0.1", 
-                             facecolor='lightgreen', edgecolor='green', linewidth=2)
-    ax.add_patch(alice_box)
-    ax.add_patch(bob_box)
-    
-    ax.text(2, 8.5, 'Alice', ha='center', fontsize=14, weight='bold')
-    ax.text(10, 8.5, 'Bob', ha='center', fontsize=14, weight='bold')
-    
-    # Secure channel components
-    ax.text(2, 7.8, 'Secure Channel', ha='center', fontsize=12, weight='bold')
-    ax.text(2, 7.3, '• Authenticated DH', ha='center', fontsize=9)
-    ax.text(2, 7, '• Shared Key', ha='center', fontsize=9)
-    ax.text(2, 6.7, '• ChaCha20-Poly1305', ha='center', fontsize=9)
-    
-    ax.text(10, 7.8, 'Secure Channel', ha='center', fontsize=12, weight='bold')
-    ax.text(10, 7.3, '• Authenticated DH', ha='center', fontsize=9)
-    ax.text(10, 7, '• Shared Key', ha='center', fontsize=9)
-    ax.text(10, 6.7, '• ChaCha20-Poly1305', ha='center', fontsize=9)
-    
-    # Messages
-    msg_box1 = FancyBboxPatch((4, 7.5), 3.5, 1, boxstyle="round,pad=0.1", 
-                             facecolor='white', edgecolor='purple', linewidth=2)
-    msg_box2 = FancyBboxPatch((4.5, 5.5), 3.5, 1, boxstyle="round,pad=0.1", 
-                             facecolor='white', edgecolor='purple', linewidth=2)
-    ax.add_patch(msg_box1)
-    ax.add_patch(msg_box2)
-    
-    ax.text(5.75, 8, 'Encrypted Message', ha='center', fontsize=11, weight='bold')
-    ax.text(5.75, 7.7, '{ciphertext, nonce}', ha='center', fontsize=10, style='italic')
-    ax.text(6.25, 6, 'Encrypted Response', ha='center', fontsize=11, weight='bold')
-    ax.text(6.25, 5.7, '{ciphertext, nonce}', ha='center', fontsize=10, style='italic')
-    
-    # Arrows
-    arrow1 = FancyArrowPatch((3.5, 8), (8.5, 8), arrowstyle='->', mutation_scale=20, 
-                             color='purple', linewidth=2)
-    arrow2 = FancyArrowPatch((8.5, 6), (3.5, 6), arrowstyle='->', mutation_scale=20, 
-                             color='purple', linewidth=2)
-    ax.add_patch(arrow1)
-    ax.add_patch(arrow2)
-    
-    # Security properties
-    security_box = FancyBboxPatch((3, 2), 6, 2.5, boxstyle="round,pad=0.15", 
-                                 facecolor='lightyellow', edgecolor='gold', linewidth=2)
-    ax.add_patch(security_box)
-    
-    ax.text(6, 4, 'Security Properties', ha='center', fontsize=13, weight='bold')
-    ax.text(4, 3.5, '✅ Confidentiality', ha='left', fontsize=11)
-    ax.text(8, 3.5, '✅ Integrity', ha='left', fontsize=11)
-    ax.text(4, 3, '✅ Authentication', ha='left', fontsize=11)
-    ax.text(8, 3, '✅ Replay Protection', ha='left', fontsize=11)
-    ax.text(6, 2.5, '✅ Forward Secrecy (via ephemeral DH)', ha='center', fontsize=10)
-    
-    ax.set_title('Phase 4: Secure Channel with AEAD Encryption', 
-                 fontsize=16, weight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig('visualizations/secure_channel.png', dpi=300, bbox_inches='tight')
-    print("✅ Saved: visualizations/secure_channel.png")
-
-
-def create_blockchain_diagram():
-    # Create a diagram showing blockchain-integrated key verification
-    fig, ax = plt.subplots(1, 1, figsize=(16, 10))
-    ax.set_xlim(0, 14)
-    ax.set_ylim(0, 10)
+# Each diagram is saved as a resolution-independent SVG, plus a PNG (150 dpi
+# by default; pass dpi=300 for print quality) if matplotlib is available.
+DEFAULT_DPI = 150
+OUTPUT_FORMATS = ('.svg', '.png') if matplotlib is not None else ('.svg',)
+
+# Rendered files are cached by content: the key is a hash of the diagram's
+# spec, the dpi, the renderers' source and the matplotlib version, so a
+# diagram is only redrawn when what it shows (or how it is drawn) changes.
+# index.json maps each output path to its current key, so replaced entries can
+# be deleted; it is only written by the parent process (see
+# generate_all_diagrams).
+CACHE_DIR = os.path.join('visualizations', '.cache')
+CACHE_INDEX = os.path.join(CACHE_DIR, 'index.json')
+
+
+def _load_cache_index():
+    try:
+        with open(CACHE_INDEX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_cache_index(entries):
+    # Record the current (out_path, key) of each diagram and delete the cached
+    # files of any key it replaces.
+    index = _load_cache_index()
+    for out_path, key in entries:
+        old_key = index.get(out_path)
+        if old_key and old_key != key:
+            for ext in ('.svg', '.png'):
+                try:
+                    os.remove(os.path.join(CACHE_DIR, old_key + ext))
+                except OSError:
+                    pass
+        index[out_path] = key
+    with open(CACHE_INDEX, 'w') as f:
+        json.dump(index, f, indent=2)
+
+
+def render_spec(spec, out_path, dpi=DEFAULT_DPI):
+    # Draw a diagram spec with matplotlib and save it to out_path (a .png).
+    # spec['patches'] holds ('box', (x, y), width, height, kwargs) and
+    # ('arrow', (x1, y1), (x2, y2), kwargs) entries;
+    # spec['texts'] holds (x, y, text, kwargs) entries.
+    fig, ax = plt.subplots(1, 1, figsize=spec['figsize'])
+    ax.set_xlim(*spec['xlim'])
+    ax.set_ylim(*spec['ylim'])
     ax.axis('off')
-    
-    # Participants
-    alice_box = FancyBboxPatch((1, 7), 2.5, 2, boxstyle="round,pad=0.1", 
-                               facecolor='lightblue', edgecolor='blue', linewidth=2)
-    bob_box = FancyBboxPatch((10.5, 7), 2.5, 2, boxstyle="round,pad=0.1", 
-                             facecolor='lightgreen', edgecolor='green', linewidth=2)
-    ax.add_patch(alice_box)
-    ax.add_patch(bob_box)
-    
-    ax.text(2.25, 8.5, 'Alice', ha='center', fontsize=14, weight='bold')
-    ax.text(11.75, 8.5, 'Bob', ha='center', fontsize=14, weight='bold')
-    
-    # Blockchain
-    blockchain_box = FancyBboxPatch((4, 1), 6, 5, boxstyle="round,pad=0.2", 
-                                    facecolor='lightgray', edgecolor='black', linewidth=3)
-    ax.add_patch(blockchain_box)
-    
-    ax.text(7, 5.5, 'Solana Blockchain', ha='center', fontsize=16, weight='bold')
-    
-    # Registry entries
-    entry1 = FancyBboxPatch((4.5, 4), 5.5, 0.8, boxstyle="round,pad=0.05", 
-                           facecolor='white', edgecolor='blue', linewidth=1)
-    entry2 = FancyBboxPatch((4.5, 2.5), 5.5, 0.8, boxstyle="round,pad=0.05", 
-                           facecolor='white', edgecolor='green', linewidth=1)
-    ax.add_patch(entry1)
-    ax.add_patch(entry2)
-    
-    ax.text(7.25, 4.4, 'Alice: wallet_addr → Ed25519_pubkey', ha='center', fontsize=10)
-    ax.text(7.25, 2.9, 'Bob: wallet_addr → Ed25519_pubkey', ha='center', fontsize=10)
-    
-    # Verification arrows
-    arrow1 = FancyArrowPatch((3.5, 8), (5, 4.5), arrowstyle='->', mutation_scale=20, 
-                             color='blue', linewidth=2, linestyle='--')
-    arrow2 = FancyArrowPatch((11, 8), (9.5, 4.5), arrowstyle='->', mutation_scale=20, 
-                             color='green', linewidth=2, linestyle='--')
-    arrow3 = FancyArrowPatch((5, 3.5), (3.5, 8), arrowstyle='->', mutation_scale=20, 
-                             color='purple', linewidth=2)
-    arrow4 = FancyArrowPatch((9.5, 3.5), (11, 8), arrowstyle='->', mutation_scale=20, 
-                             color='purple', linewidth=2)
-    
-    ax.add_patch(arrow1)
-    ax.add_patch(arrow2)
-    ax.add_patch(arrow3)
-    ax.add_patch(arrow4)
-    
-    ax.text(4, 6.5, 'Register', ha='center', fontsize=10, color='blue', style='italic')
-    ax.text(10, 6.5, 'Register', ha='center', fontsize=10, color='green', style='italic')
-    ax.text(4, 5.5, 'Verify', ha='center', fontsize=10, color='purple', weight='bold')
-    ax.text(10, 5.5, 'Verify', ha='center', fontsize=10, color='purple', weight='bold')
-    
-    # Key exchange
-    msg_box = FancyBboxPatch((4.5, 7.5), 5, 0.6, boxstyle="round,pad=0.05", 
-                            facecolor='yellow', edgecolor='orange', linewidth=2)
-    ax.add_patch(msg_box)
-    ax.text(7, 7.8, 'Key Exchange with Verified Keys', ha='center', fontsize=11, weight='bold')
-    
-    # Benefits
-    benefits_box = FancyBboxPatch((1, 0.5), 12, 0.8, boxstyle="round,pad=0.1", 
-                                  facecolor='lightyellow', edgecolor='gold', linewidth=2)
-    ax.add_patch(benefits_box)
-    ax.text(7, 0.9, 'Decentralized Trust • No Certificate Authorities • Immutable Registry', 
-            ha='center', fontsize=11, weight='bold')
-    
-    ax.set_title('Phase 5: Blockchain-Integrated Key Verification', 
-                 fontsize=16, weight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig('visualizations/blockchain_integration.png', dpi=300, bbox_inches='tight')
-    print("✅ Saved: visualizations/blockchain_integration.png")
-
-
-def generate_all_diagrams():
-    # Generate all visualization diagrams
-    import os
+
+    # Boxes go into one PatchCollection (keeping each box's own colours and
+    # line width) and are drawn as a single artist. Arrows stay separate
+    # patches, since their arrow heads are built when they are drawn. Arrows
+    # now always draw over boxes; where they meet (at the party boxes) they
+    # already did.
+    boxes = []
+    for kind, *args in spec['patches']:
+        if kind == 'box':
+            xy, width, height, kwargs = args
+            boxes.append(FancyBboxPatch(xy, width, height, **kwargs))
+    ax.add_collection(PatchCollection(boxes, match_original=True))
+    for kind, *args in spec['patches']:
+        if kind == 'arrow':
+            start, end, kwargs = args
+            ax.add_patch(FancyArrowPatch(start, end, **kwargs))
+    for x, y, text, kwargs in spec['texts']:
+        ax.text(x, y, text, **kwargs)
+
+    ax.set_title(spec['title'], fontsize=16, weight='bold', pad=20)
+    # Fixed margins instead of tight_layout(): bbox_inches='tight' already
+    # measures the drawn artists to crop the page, so tight_layout's own
+    # measuring pass would be a second full draw.
+    fig.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=0.92)
+    plt.savefig(out_path, dpi=dpi, bbox_inches='tight', pad_inches=0.1)
+    plt.close(fig)
+
+
+# SVG output: data coordinates are scaled to points (1/72 inch) so the page
+# matches the spec's figsize, with room above the axes for the title.
+_SVG_TITLE_HEIGHT = 50
+_SVG_ANCHOR = {'center': 'middle', 'left': 'start', 'right': 'end'}
+_SVG_BASELINE = {'center': 'central', 'top': 'hanging', 'bottom': 'text-after-edge'}
+
+
+def _svg_pad(boxstyle, default):
+    # The pad=... value of a boxstyle string like "round,pad=0.1".
+    for part in boxstyle.split(',')[1:]:
+        name, _, value = part.partition('=')
+        if name.strip() == 'pad':
+            return float(value)
+    return default
+
+
+def render_spec_svg(spec, out_path):
+    # Write a diagram spec as SVG markup to out_path (a .svg). Mirrors what
+    # render_spec draws: rounded boxes grown by their pad, open '->' arrows
+    # (8pt heads at mutation_scale=20), and text with its alignment, weight,
+    # style and optional rounded background.
+    (x0, x1), (y0, y1) = spec['xlim'], spec['ylim']
+    width, height = spec['figsize'][0] * 72, spec['figsize'][1] * 72
+    sx, sy = width / (x1 - x0), height / (y1 - y0)
+
+    def px(x, y):
+        return (x - x0) * sx, _SVG_TITLE_HEIGHT + (y1 - y) * sy
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}pt" '
+        f'height="{height + _SVG_TITLE_HEIGHT:g}pt" '
+        f'viewBox="0 0 {width:g} {height + _SVG_TITLE_HEIGHT:g}" font-family="DejaVu Sans, sans-serif">',
+        f'<rect width="100%" height="100%" fill="white"/>',
+        f'<text x="{width / 2:.1f}" y="{_SVG_TITLE_HEIGHT - 15}" text-anchor="middle" '
+        f'font-size="16" font-weight="bold">{escape(spec["title"])}</text>',
+    ]
+
+    for kind, *args in spec['patches']:
+        if kind != 'box':
+            continue
+        (x, y), w, h, kwargs = args
+        pad = _svg_pad(kwargs.get('boxstyle', ''), 0.3)
+        left, top = px(x - pad, y + h + pad)
+        out.append(
+            f'<rect x="{left:.1f}" y="{top:.1f}" width="{(w + 2 * pad) * sx:.1f}" '
+            f'height="{(h + 2 * pad) * sy:.1f}" rx="{pad * sx:.1f}" ry="{pad * sy:.1f}" '
+            f'fill="{kwargs.get("facecolor", "none")}" stroke="{kwargs.get("edgecolor", "black")}" '
+            f'stroke-width="{kwargs.get("linewidth", 1)}"/>'
+        )
+
+    for kind, *args in spec['patches']:
+        if kind != 'arrow':
+            continue
+        start, end, kwargs = args
+        (ax_, ay), (bx, by) = px(*start), px(*end)
+        length = math.hypot(bx - ax_, by - ay)
+        dx, dy = (bx - ax_) / length, (by - ay) / length
+        # FancyArrowPatch shrinks both ends by 2pt.
+        ax_, ay, bx, by = ax_ + 2 * dx, ay + 2 * dy, bx - 2 * dx, by - 2 * dy
+        scale = kwargs.get('mutation_scale', 20)
+        head_length, head_width = 0.4 * scale, 0.2 * scale
+        color, stroke_width = kwargs.get('color', 'black'), kwargs.get('linewidth', 1)
+        dash = ' stroke-dasharray="6,3"' if kwargs.get('linestyle') == '--' else ''
+        hx, hy = bx - head_length * dx, by - head_length * dy
+        out.append(
+            f'<line x1="{ax_:.1f}" y1="{ay:.1f}" x2="{bx:.1f}" y2="{by:.1f}" '
+            f'stroke="{color}" stroke-width="{stroke_width}"{dash}/>'
+        )
+        out.append(
+            f'<polyline points="{hx - head_width * dy:.1f},{hy + head_width * dx:.1f} '
+            f'{bx:.1f},{by:.1f} {hx + head_width * dy:.1f},{hy - head_width * dx:.1f}" '
+            f'fill="none" stroke="{color}" stroke-width="{stroke_width}"/>'
+        )
+
+    for x, y, text, kwargs in spec['texts']:
+        tx, ty = px(x, y)
+        size = kwargs.get('fontsize', 10)
+        lines = text.split('\n')
+        attrs = (
+            f'text-anchor="{_SVG_ANCHOR.get(kwargs.get("ha"), "start")}" '
+            f'dominant-baseline="{_SVG_BASELINE.get(kwargs.get("va"), "alphabetic")}" '
+            f'font-size="{size}" font-weight="{kwargs.get("weight", "normal")}" '
+            f'font-style="{kwargs.get("style", "normal")}" fill="{kwargs.get("color", "black")}"'
+        )
+        # Multi-line text is centred on its anchor as a block.
+        first_dy = -(len(lines) - 1) / 2 * 1.2 * size if kwargs.get('va') == 'center' else 0
+        bbox = kwargs.get('bbox')
+        if bbox is not None:
+            # No text metrics without a renderer: estimate the background box.
+            box_pad = 0.3 * size
+            box_w = max(len(line) for line in lines) * 0.6 * size + 2 * box_pad
+            box_h = len(lines) * 1.2 * size + 2 * box_pad
+            box_x = tx - {'middle': box_w / 2, 'end': box_w}.get(_SVG_ANCHOR.get(kwargs.get('ha')), 0)
+            box_y = ty - box_h / 2 if kwargs.get('va') == 'center' else ty - box_h + box_pad
+            out.append(
+                f'<rect x="{box_x:.1f}" y="{box_y:.1f}" width="{box_w:.1f}" height="{box_h:.1f}" '
+                f'rx="{box_pad:.1f}" fill="{bbox.get("facecolor", "white")}" '
+                f'fill-opacity="{bbox.get("alpha", 1)}" stroke="black" stroke-opacity="{bbox.get("alpha", 1)}"/>'
+            )
+        spans = ''.join(
+            f'<tspan x="{tx:.1f}" dy="{first_dy if i == 0 else 1.2 * size:.1f}">{escape(line)}</tspan>'
+            for i, line in enumerate(lines)
+        )
+        out.append(f'<text x="{tx:.1f}" y="{ty:.1f}" {attrs}>{spans}</text>')
+
+    out.append('</svg>\n')
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out))
+
+
+def _cache_key(spec, dpi):
+    return hashlib.sha256(
+        json.dumps(spec, sort_keys=True).encode()
+        + str(dpi).encode()
+        + inspect.getsource(render_spec_svg).encode()
+        + (inspect.getsource(render_spec) + matplotlib.__version__ if matplotlib is not None else '').encode()
+    ).hexdigest()
+
+
+def _restore_from_cache(key, out_path):
+    # Copy a cached rendering into place; False if it isn't cached.
+    out_base = os.path.splitext(out_path)[0]
+    cached_base = os.path.join(CACHE_DIR, key)
+    if not all(os.path.exists(cached_base + ext) for ext in OUTPUT_FORMATS):
+        return False
+    for ext in OUTPUT_FORMATS:
+        shutil.copyfile(cached_base + ext, out_base + ext)
+    return True
+
+
+def _render_to_cache(spec, out_path, key, dpi):
+    # Render a spec next to out_path (out_path itself is the .png) and keep a
+    # copy in the cache under key.
+    out_base = os.path.splitext(out_path)[0]
+    render_spec_svg(spec, out_base + '.svg')
+    if matplotlib is not None:
+        render_spec(spec, out_base + '.png', dpi)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for ext in OUTPUT_FORMATS:
+        shutil.copyfile(out_base + ext, os.path.join(CACHE_DIR, key) + ext)
+
+
+def render_cached(build_spec, out_path, dpi=DEFAULT_DPI):
+    # Build a spec and render it next to out_path, or, on a cache hit, copy
+    # the cached files into place instead. Returns (out_path, key, was_cached).
+    spec = build_spec()
+    key = _cache_key(spec, dpi)
+    if _restore_from_cache(key, out_path):
+        return out_path, key, True
+    _render_to_cache(spec, out_path, key, dpi)
+    return out_path, key, False
+
+
+def build_dh_exchange_spec():
+    # Basic DH key exchange between Alice and Bob
+    return {
+        'figsize': (12, 8), 'xlim': (0, 10), 'ylim': (0, 6),
+        'title': 'Phase 1: Basic Diffie-Hellman Key Exchange',
+        'patches': [
+            # Alice and Bob boxes
+            ('box', (0.5, 2), 2, 2, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightblue', edgecolor='blue', linewidth=2)),
+            ('box', (7.5, 2), 2, 2, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightgreen', edgecolor='green', linewidth=2)),
+            # Arrows showing key exchange
+            ('arrow', (2.5, 3), (7.5, 3.8), dict(arrowstyle='->', mutation_scale=20,
+                                                 color='blue', linewidth=2, label='Alice → Bob: g^a')),
+            ('arrow', (7.5, 2.2), (2.5, 3), dict(arrowstyle='->', mutation_scale=20,
+                                                 color='green', linewidth=2, label='Bob → Alice: g^b')),
+        ],
+        'texts': [
+            # Labels
+            (1.5, 4.5, 'Alice', dict(ha='center', va='center', fontsize=14, weight='bold')),
+            (8.5, 4.5, 'Bob', dict(ha='center', va='center', fontsize=14, weight='bold')),
+            # Public keys
+            (1.5, 3.5, 'g^a (pub)', dict(ha='center', va='center', fontsize=10)),
+            (8.5, 3.5, 'g^b (pub)', dict(ha='center', va='center', fontsize=10)),
+            # Shared key
+            (5, 1, 'Shared Key: g^(ab)', dict(ha='center', va='center',
+                                              fontsize=12, weight='bold', style='italic',
+                                              bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.7))),
+        ],
+    }
+
+
+def build_mitm_attack_spec():
+    # MITM attack: Mallory sits between Alice and Bob
+    return {
+        'figsize': (14, 8), 'xlim': (0, 12), 'ylim': (0, 8),
+        'title': 'Phase 2: Man-in-the-Middle Attack',
+        'patches': [
+            # Alice, Mallory, and Bob boxes
+            ('box', (0.5, 5), 2, 2, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightblue', edgecolor='blue', linewidth=2)),
+            ('box', (4.5, 2), 3, 2, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightcoral', edgecolor='red', linewidth=2)),
+            ('box', (9.5, 5), 2, 2, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightgreen', edgecolor='green', linewidth=2)),
+            # Attack arrows
+            ('arrow', (2.5, 6), (4.5, 3.5), dict(arrowstyle='->', mutation_scale=20,
+                                                 color='blue', linewidth=2)),
+            ('arrow', (4.5, 3.5), (9.5, 6.2), dict(arrowstyle='->', mutation_scale=20,
+                                                   color='red', linewidth=2, linestyle='--')),
+            ('arrow', (9.5, 5.8), (4.5, 2.5), dict(arrowstyle='->', mutation_scale=20,
+                                                   color='green', linewidth=2)),
+            ('arrow', (4.5, 2.5), (2.5, 6), dict(arrowstyle='->', mutation_scale=20,
+                                                 color='red', linewidth=2, linestyle='--')),
+            # Result boxes
+            ('box', (0.5, 0.5), 2, 1, dict(boxstyle="round,pad=0.1",
+                                           facecolor='yellow', edgecolor='orange', linewidth=1)),
+            ('box', (9.5, 0.5), 2, 1, dict(boxstyle="round,pad=0.1",
+                                           facecolor='yellow', edgecolor='orange', linewidth=1)),
+        ],
+        'texts': [
+            # Labels
+            (1.5, 7, 'Alice', dict(ha='center', va='center', fontsize=14, weight='bold')),
+            (6, 3.5, 'Mallory\n(Attacker)', dict(ha='center', va='center', fontsize=12, weight='bold', color='darkred')),
+            (10.5, 7, 'Bob', dict(ha='center', va='center', fontsize=14, weight='bold')),
+            # Labels on arrows
+            (3.5, 5.5, 'g^a', dict(ha='center', fontsize=10, color='blue')),
+            (7, 5, 'g^m', dict(ha='center', fontsize=10, color='red', style='italic', weight='bold')),
+            (7, 3.5, 'g^b', dict(ha='center', fontsize=10, color='green')),
+            (3.5, 3.5, 'g^m', dict(ha='center', fontsize=10, color='red', style='italic', weight='bold')),
+            # Results
+            (1.5, 1, 'Key: g^(am)', dict(ha='center', va='center', fontsize=10)),
+            (10.5, 1, 'Key: g^(bm)', dict(ha='center', va='center', fontsize=10)),
+            # Warning
+            (6, 0.5, '⚠️ MITM SUCCESS', dict(ha='center', va='center',
+                                             fontsize=14, weight='bold', color='red',
+                                             bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))),
+        ],
+    }
+
+
+def build_authenticated_flow_spec():
+    # Authenticated DH with signatures
+    return {
+        'figsize': (14, 10), 'xlim': (0, 12), 'ylim': (0, 10),
+        'title': 'Phase 3: Authenticated Diffie-Hellman (MITM Prevented)',
+        'patches': [
+            # Alice and Bob
+            ('box', (0.5, 6), 2.5, 3, dict(boxstyle="round,pad=0.1",
+                                           facecolor='lightblue', edgecolor='blue', linewidth=2)),
+            ('box', (9, 6), 2.5, 3, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightgreen', edgecolor='green', linewidth=2)),
+            # Messages
+            ('box', (3.5, 8), 3, 0.8, dict(boxstyle="round,pad=0.05",
+                                           facecolor='white', edgecolor='blue', linewidth=1.5)),
+            ('box', (6, 6.5), 3, 0.8, dict(boxstyle="round,pad=0.05",
+                                           facecolor='white', edgecolor='green', linewidth=1.5)),
+            # Arrows
+            ('arrow', (3, 8.4), (9, 8.4), dict(arrowstyle='->', mutation_scale=20,
+                                               color='blue', linewidth=2)),
+            ('arrow', (9, 6.9), (3, 6.9), dict(arrowstyle='->', mutation_scale=20,
+                                               color='green', linewidth=2)),
+            # Verification
+            ('box', (4.5, 4.5), 3, 1, dict(boxstyle="round,pad=0.1",
+                                           facecolor='lightyellow', edgecolor='orange', linewidth=2)),
+            ('box', (4.5, 2.5), 3, 1, dict(boxstyle="round,pad=0.1",
+                                           facecolor='lightyellow', edgecolor='orange', linewidth=2)),
+        ],
+        'texts': [
+            (1.75, 8.5, 'Alice', dict(ha='center', va='center', fontsize=14, weight='bold')),
+            (10.25, 8.5, 'Bob', dict(ha='center', va='center', fontsize=14, weight='bold')),
+            # Keys
+            (1.75, 7.8, 'DH: g^a', dict(ha='center', fontsize=10)),
+            (1.75, 7.3, 'Sign: Ed25519', dict(ha='center', fontsize=10)),
+            (10.25, 7.8, 'DH: g^b', dict(ha='center', fontsize=10)),
+            (10.25, 7.3, 'Sign: Ed25519', dict(ha='center', fontsize=10)),
+            # Messages
+            (5, 8.4, '{g^a, sig_a(g^a)}', dict(ha='center', fontsize=11, weight='bold')),
+            (7.5, 6.9, '{g^b, sig_b(g^b)}', dict(ha='center', fontsize=11, weight='bold')),
+            # Verification
+            (6, 5, 'Bob verifies sig_a(g^a)', dict(ha='center', va='center', fontsize=11)),
+            (6, 3, 'Alice verifies sig_b(g^b)', dict(ha='center', va='center', fontsize=11)),
+            # Success
+            (6, 0.5, '✅ Shared Key: g^(ab) (Verified)', dict(ha='center', va='center',
+                                                             fontsize=14, weight='bold', color='green',
+                                                             bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8))),
+        ],
+    }
+
+
+def build_secure_channel_spec():
+    # Complete secure channel with AEAD
+    return {
+        'figsize': (14, 10), 'xlim': (0, 12), 'ylim': (0, 10),
+        'title': 'Phase 4: Secure Channel with AEAD Encryption',
+        'patches': [
+            # Alice and Bob
+            ('box', (0.5, 6), 3, 3, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightblue', edgecolor='blue', linewidth=2)),
+            ('box', (8.5, 6), 3, 3, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightgreen', edgecolor='green', linewidth=2)),
+            # Messages
+            ('box', (4, 7.5), 3.5, 1, dict(boxstyle="round,pad=0.1",
+                                           facecolor='white', edgecolor='purple', linewidth=2)),
+            ('box', (4.5, 5.5), 3.5, 1, dict(boxstyle="round,pad=0.1",
+                                             facecolor='white', edgecolor='purple', linewidth=2)),
+            # Arrows
+            ('arrow', (3.5, 8), (8.5, 8), dict(arrowstyle='->', mutation_scale=20,
+                                               color='purple', linewidth=2)),
+            ('arrow', (8.5, 6), (3.5, 6), dict(arrowstyle='->', mutation_scale=20,
+                                               color='purple', linewidth=2)),
+            # Security properties
+            ('box', (3, 2), 6, 2.5, dict(boxstyle="round,pad=0.15",
+                                         facecolor='lightyellow', edgecolor='gold', linewidth=2)),
+        ],
+        'texts': [
+            (2, 8.5, 'Alice', dict(ha='center', fontsize=14, weight='bold')),
+            (10, 8.5, 'Bob', dict(ha='center', fontsize=14, weight='bold')),
+            # Secure channel components
+            (2, 7.8, 'Secure Channel', dict(ha='center', fontsize=12, weight='bold')),
+            (2, 7.3, '• Authenticated DH', dict(ha='center', fontsize=9)),
+            (2, 7, '• Shared Key', dict(ha='center', fontsize=9)),
+            (2, 6.7, '• ChaCha20-Poly1305', dict(ha='center', fontsize=9)),
+            (10, 7.8, 'Secure Channel', dict(ha='center', fontsize=12, weight='bold')),
+            (10, 7.3, '• Authenticated DH', dict(ha='center', fontsize=9)),
+            (10, 7, '• Shared Key', dict(ha='center', fontsize=9)),
+            (10, 6.7, '• ChaCha20-Poly1305', dict(ha='center', fontsize=9)),
+            # Messages
+            (5.75, 8, 'Encrypted Message', dict(ha='center', fontsize=11, weight='bold')),
+            (5.75, 7.7, '{ciphertext, nonce}', dict(ha='center', fontsize=10, style='italic')),
+            (6.25, 6, 'Encrypted Response', dict(ha='center', fontsize=11, weight='bold')),
+            (6.25, 5.7, '{ciphertext, nonce}', dict(ha='center', fontsize=10, style='italic')),
+            # Security properties
+            (6, 4, 'Security Properties', dict(ha='center', fontsize=13, weight='bold')),
+            (4, 3.5, '✅ Confidentiality', dict(ha='left', fontsize=11)),
+            (8, 3.5, '✅ Integrity', dict(ha='left', fontsize=11)),
+            (4, 3, '✅ Authentication', dict(ha='left', fontsize=11)),
+            (8, 3, '✅ Replay Protection', dict(ha='left', fontsize=11)),
+            (6, 2.5, '✅ Forward Secrecy (via ephemeral DH)', dict(ha='center', fontsize=10)),
+        ],
+    }
+
+
+def build_blockchain_spec():
+    # Blockchain-integrated key verification
+    return {
+        'figsize': (16, 10), 'xlim': (0, 14), 'ylim': (0, 10),
+        'title': 'Phase 5: Blockchain-Integrated Key Verification',
+        'patches': [
+            # Participants
+            ('box', (1, 7), 2.5, 2, dict(boxstyle="round,pad=0.1",
+                                         facecolor='lightblue', edgecolor='blue', linewidth=2)),
+            ('box', (10.5, 7), 2.5, 2, dict(boxstyle="round,pad=0.1",
+                                            facecolor='lightgreen', edgecolor='green', linewidth=2)),
+            # Blockchain
+            ('box', (4, 1), 6, 5, dict(boxstyle="round,pad=0.2",
+                                       facecolor='lightgray', edgecolor='black', linewidth=3)),
+            # Registry entries
+            ('box', (4.5, 4), 5.5, 0.8, dict(boxstyle="round,pad=0.05",
+                                             facecolor='white', edgecolor='blue', linewidth=1)),
+            ('box', (4.5, 2.5), 5.5, 0.8, dict(boxstyle="round,pad=0.05",
+                                               facecolor='white', edgecolor='green', linewidth=1)),
+            # Verification arrows
+            ('arrow', (3.5, 8), (5, 4.5), dict(arrowstyle='->', mutation_scale=20,
+                                               color='blue', linewidth=2, linestyle='--')),
+            ('arrow', (11, 8), (9.5, 4.5), dict(arrowstyle='->', mutation_scale=20,
+                                                color='green', linewidth=2, linestyle='--')),
+            ('arrow', (5, 3.5), (3.5, 8), dict(arrowstyle='->', mutation_scale=20,
+                                               color='purple', linewidth=2)),
+            ('arrow', (9.5, 3.5), (11, 8), dict(arrowstyle='->', mutation_scale=20,
+                                                color='purple', linewidth=2)),
+            # Key exchange
+            ('box', (4.5, 7.5), 5, 0.6, dict(boxstyle="round,pad=0.05",
+                                             facecolor='yellow', edgecolor='orange', linewidth=2)),
+            # Benefits
+            ('box', (1, 0.5), 12, 0.8, dict(boxstyle="round,pad=0.1",
+                                            facecolor='lightyellow', edgecolor='gold', linewidth=2)),
+        ],
+        'texts': [
+            (2.25, 8.5, 'Alice', dict(ha='center', fontsize=14, weight='bold')),
+            (11.75, 8.5, 'Bob', dict(ha='center', fontsize=14, weight='bold')),
+            (7, 5.5, 'Solana Blockchain', dict(ha='center', fontsize=16, weight='bold')),
+            (7.25, 4.4, 'Alice: wallet_addr → Ed25519_pubkey', dict(ha='center', fontsize=10)),
+            (7.25, 2.9, 'Bob: wallet_addr → Ed25519_pubkey', dict(ha='center', fontsize=10)),
+            (4, 6.5, 'Register', dict(ha='center', fontsize=10, color='blue', style='italic')),
+            (10, 6.5, 'Register', dict(ha='center', fontsize=10, color='green', style='italic')),
+            (4, 5.5, 'Verify', dict(ha='center', fontsize=10, color='purple', weight='bold')),
+            (10, 5.5, 'Verify', dict(ha='center', fontsize=10, color='purple', weight='bold')),
+            (7, 7.8, 'Key Exchange with Verified Keys', dict(ha='center', fontsize=11, weight='bold')),
+            (7, 0.9, 'Decentralized Trust • No Certificate Authorities • Immutable Registry',
+             dict(ha='center', fontsize=11, weight='bold')),
+        ],
+    }
+
+
+# Every diagram: (spec builder, output path of its PNG; the SVG sits next to it).
+DIAGRAMS = [
+    (build_dh_exchange_spec, 'visualizations/dh_exchange.png'),
+    (build_mitm_attack_spec, 'visualizations/mitm_attack.png'),
+    (build_authenticated_flow_spec, 'visualizations/authenticated_flow.png'),
+    (build_secure_channel_spec, 'visualizations/secure_channel.png'),
+    (build_blockchain_spec, 'visualizations/blockchain_integration.png'),
+]
+
+
+def generate_all_diagrams(dpi=DEFAULT_DPI):
+    # Generate all visualization diagrams, redrawing only the ones whose spec
+    # (or renderer) changed since they were last written.
     os.makedirs('visualizations', exist_ok=True)
-    
+
     print("Generating visualization diagrams...")
     print("-" * 50)
-    
-    create_dh_exchange_diagram()
-    create_mitm_attack_diagram()
-    create_authenticated_flow_diagram()
-    create_secure_channel_diagram()
-    create_blockchain_diagram()
-    
-    print("-" * 50)
-    print("✅ All diagrams generated successfully!")
 
+    # Specs are cheap to build, so every key is known up front. A diagram
+    # whose files on disk already match its key is left alone; one with a
+    # cached copy is restored; only the rest are rendered.
+    index = _load_cache_index()
+    results = {}  # out_path -> (key, was_cached)
+    dirty = []
+    for build_spec, out_path in DIAGRAMS:
+        spec = build_spec()
+        key = _cache_key(spec, dpi)
+        out_base = os.path.splitext(out_path)[0]
+        if index.get(out_path) == key and all(os.path.exists(out_base + ext) for ext in OUTPUT_FORMATS):
+            results[out_path] = (key, True)
+        elif _restore_from_cache(key, out_path):
+            results[out_path] = (key, True)
+        else:
+            dirty.append((spec, out_path, key))
 
-if __name__ == "__main__":
-    generate_all_diagrams()
+    if dirty:
+        # Each diagram is its own figure, so they render in parallel. Where
+        # available, workers fork from a server that has already imported
+        # pyplot rather than each importing matplotlib from scratch.
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
 
+        mp_context = None
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('forkserver')
+            mp_context.set_forkserver_preload(['matplotlib.pyplot'])
+        with ProcessPoolExecutor(max_workers=len(dirty), mp_context=mp_context) as pool:
+            futures = [pool.submit(_render_to_cache, spec, out_path, key, dpi)
+                       for spec, out_path, key in dirty]
+            for future in futures:
+                future.result()
+        for _, out_path, key in dirty:
+            results[out_path] = (key, False)
 
+    # Report from here, in order, rather than from interleaving workers.
+    for _, out_path in DIAGRAMS:
+        files = ', '.join(os.path.splitext(out_path)[0] + ext for ext in OUTPUT_FORMATS)
+        print(f"✅ {'Up to date' if results[out_path][1] else 'Saved'}: {files}")
+    _update_cache_index([(out_path, key) for out_path, (key, _) in results.items()])
 
+    print("-" * 50)
+    print("✅ All diagrams generated successfully!")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the project diagrams.")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI,
+                        help=f"PNG resolution (default {DEFAULT_DPI}; 300 for print)")
+    generate_all_diagrams(parser.parse_args().dpi)
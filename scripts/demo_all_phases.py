@@ -1,40 +1,61 @@
 # Run all phases in order (interactive demo runner).
 
-import sys
+import argparse
+import contextlib
+import importlib.util
+import io
 import os
+import runpy
+import select
+import sys
+
+PHASES = [
+    (1, "Basic Diffie-Hellman Key Exchange", "phases.phase1_dh.dh_exchange"),
+    (2, "Man-in-the-Middle Attack", "phases.phase2_mitm.mallory_attack"),
+    (3, "Authenticated Diffie-Hellman", "phases.phase3_auth.authenticated_dh"),
+    (4, "Secure Channel with AEAD Encryption", "phases.phase4_aead.secure_channel"),
+    (5, "Blockchain Integration (Solana)", "phases.phase5_solana.solana_registry_client"),
+    (6, "Blockchain Attack Prevention", "phases.phase6_blockchain_attack.blockchain_mitm_attack"),
+]
+
+# Third-party libraries the phases share. With --parallel, a forkserver imports
+# these once and each phase process forks from it already loaded. (Missing ones
+# are skipped; the phase modules themselves are not preloaded, so every phase
+# still starts from a clean slate.)
+PRELOAD_MODULES = [
+    "cryptography.hazmat.primitives.asymmetric.ed25519",
+    "cryptography.hazmat.primitives.asymmetric.x25519",
+    "cryptography.hazmat.primitives.ciphers.aead",
+    "nacl.bindings",
+    "numpy",
+    "solana.rpc.api",
+]
 
 def print_separator(title=""):
-    # Print a simple banner.
-    print("\n" + "=" * 80)
-    if title:
-        print(f"  {title}")
-        print("=" * 80)
-    print()
+    # Print a simple banner (built first, written in one go).
+    rule = "=" * 80
+    print(f"\n{rule}\n  {title}\n{rule}\n" if title else f"\n{rule}\n")
 
 
-def run_phase(phase_num, phase_name, script_path):
-    # Run a phase script (keep going if it fails).
+def run_phase(phase_num, phase_name, module_name):
+    # Run a phase module as if it were the main script (keep going if it fails).
+    # Going through the import system reuses the phases' cached bytecode, and
+    # anything one phase imports (cryptography, earlier phases) stays loaded
+    # for the next.
     print_separator(f"PHASE {phase_num}: {phase_name}")
     
     try:
-        # Make the phase script's folder importable (for local imports)
-        script_dir = os.path.dirname(os.path.abspath(script_path))
-        if script_dir not in sys.path:
-            sys.path.insert(0, script_dir)
+        _add_project_root()
 
-        with open(script_path, 'r') as f:
-            script_code = f.read()
+        if importlib.util.find_spec(module_name) is None:
+            print(f"[WARNING] Module {module_name} not found")
+            print("   Skipping this phase...")
+            return
 
-        compiled_code = compile(script_code, script_path, 'exec')
-
-        exec(compiled_code, {'__name__': '__main__'})
+        runpy.run_module(module_name, run_name='__main__')
         
         print(f"\n[SUCCESS] Phase {phase_num} completed successfully")
         
-    except FileNotFoundError:
-        print(f"[WARNING] Script not found at {script_path}")
-        print("   Skipping this phase...")
-        
     except Exception as e:
         print(f"[ERROR] Error in Phase {phase_num}: {e}")
         print("   Continuing to next phase...")
@@ -42,8 +63,69 @@ def run_phase(phase_num, phase_name, script_path):
         traceback.print_exc()
 
 
+def _add_project_root():
+    # Phases import each other as `phases.<phase>.<module>`, so the project
+    # root has to be importable.
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+
+def _run_phase_captured(phase_num, phase_name, module_name):
+    # Worker for --parallel: run_phase in a child process with stdout (and the
+    # traceback, if any) captured, so the parent can print phases in order.
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+        run_phase(phase_num, phase_name, module_name)
+    return out.getvalue()
+
+
+def pause(prompt, timeout=None):
+    # Wait for Enter, or for `timeout` seconds if given (where stdin can be
+    # polled with select, i.e. not on Windows).
+    if timeout is None or os.name == "nt":
+        input(prompt)
+        return
+    print(prompt, end="", flush=True)
+    if select.select([sys.stdin], [], [], timeout)[0]:
+        sys.stdin.readline()
+    else:
+        print()
+
+
+def run_phases_parallel():
+    # Run every phase at once, one fresh process each (phases share no state,
+    # and a fresh process keeps each phase's logging setup its own), then
+    # print their output in phase order. (The process-pool machinery is only
+    # imported here, so the default interactive run doesn't pay for it.)
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    mp_context = None
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload(PRELOAD_MODULES)
+    with ProcessPoolExecutor(max_workers=len(PHASES), max_tasks_per_child=1,
+                             mp_context=mp_context) as pool:
+        futures = [pool.submit(_run_phase_captured, *phase) for phase in PHASES]
+        for future in futures:
+            print(future.result(), end="")
+
+
 def main():
-    # Run phases 1–6 with pauses in between.
+    # Run phases 1–6 with pauses in between (or without them: --auto runs
+    # back-to-back, --parallel all at once).
+    parser = argparse.ArgumentParser(description="Run all secure channel demo phases.")
+    parser.add_argument("--parallel", action="store_true",
+                        help="run all phases concurrently without pausing (for CI)")
+    parser.add_argument("--auto", action="store_true",
+                        help="run phases one after another without pausing "
+                             "(also enabled by MINI_DEMO_AUTO=1)")
+    parser.add_argument("--pause-timeout", type=float, metavar="SECONDS",
+                        help="continue automatically if Enter isn't pressed in time")
+    args = parser.parse_args()
+    parallel = args.parallel
+    auto = parallel or args.auto or os.environ.get("MINI_DEMO_AUTO", "") not in ("", "0")
     
     print_separator("MINI SECURE CHANNEL - COMPLETE DEMONSTRATION")
     print("""
@@ -76,39 +158,20 @@ Press Enter to start, or Ctrl+C to cancel...
     """)
     
     # Wait for user confirmation before starting
-    try:
-        input()
-    except KeyboardInterrupt:
-        print("\nDemo cancelled.")
-        return
-    
-    run_phase(1, "Basic Diffie-Hellman Key Exchange", 
-              "phases/phase1_dh/dh_exchange.py")
-    
-    input("\nPress Enter to continue to Phase 2...")
-    
-    run_phase(2, "Man-in-the-Middle Attack", 
-              "phases/phase2_mitm/mallory_attack.py")
-    
-    input("\nPress Enter to continue to Phase 3...")
-    
-    run_phase(3, "Authenticated Diffie-Hellman", 
-              "phases/phase3_auth/authenticated_dh.py")
-    
-    input("\nPress Enter to continue to Phase 4...")
-    
-    run_phase(4, "Secure Channel with AEAD Encryption", 
-              "phases/phase4_aead/secure_channel.py")
-    
-    input("\nPress Enter to continue to Phase 5...")
-    
-    run_phase(5, "Blockchain Integration (Solana)", 
-              "phases/phase5_solana/solana_registry_client.py")
-    
-    input("\nPress Enter to continue to Phase 6...")
+    if not auto:
+        try:
+            pause("", args.pause_timeout)
+        except KeyboardInterrupt:
+            print("\nDemo cancelled.")
+            return
     
-    run_phase(6, "Blockchain Attack Prevention", 
-              "phases/phase6_blockchain_attack/blockchain_mitm_attack.py")
+    if parallel:
+        run_phases_parallel()
+    else:
+        for i, phase in enumerate(PHASES):
+            if i and not auto:
+                pause(f"\nPress Enter to continue to Phase {phase[0]}...", args.pause_timeout)
+            run_phase(*phase)
 
     print_separator("DEMONSTRATION COMPLETE")
     print("""